@@ -2,15 +2,30 @@
 Job-related API endpoints.
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
+from operator import itemgetter
+import heapq
+import anyio
 import numpy as np
 
-from app.services.embedder import get_embedder
-from app.services.vector_store import VectorStore
+from app.core.config import settings
+from app.services import embed_cache
+from app.services.vector_store import IndexFormatError, VectorStore
+from app.services.job_fetcher import DESCRIPTION_PREVIEW_LENGTH, REQUIREMENTS_PREVIEW_LENGTH
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 
+# Job levels a candidate at each experience level is matched against
+_ALLOWED_LEVELS = {
+    "entry": frozenset({"entry", "mid"}),
+    "mid": frozenset({"entry", "mid", "senior"}),
+    "senior": frozenset({"mid", "senior", "lead"}),
+    "lead": frozenset({"senior", "lead"}),
+}
+_DEFAULT_LEVELS = frozenset({"mid"})
+
 
 class JobRecommendationRequest(BaseModel):
     resume_text: str
@@ -37,29 +52,40 @@ class JobRecommendationResponse(BaseModel):
     matches: List[JobMatch]
 
 
-# Load vector store at startup
-# embedder = None
-# vector_store = None
+# Loaded on first use and then kept resident for the life of the process,
+# so requests don't reload the index (it is memory-mapped, so workers
+# share its pages)
+vector_store: Optional[VectorStore] = None
+
+
+def _load_vector_store() -> Optional[VectorStore]:
+    """Load the ingested job index, or None if there isn't one yet"""
+    store = VectorStore(dimension=settings.EMBEDDING_DIM)
+    try:
+        store.load()
+    except (FileNotFoundError, IndexFormatError) as e:
+        print(f" Job index not available: {e}")
+        return None
+    print("   Vector store loaded successfully")
+    return store
+
 
-# @router.on_event("startup")
-# async def load_vector_store():
-#     global embedder, vector_store
-#     try:
-#         embedder = get_embedder()
-#         vector_store = VectorStore(dimension=embedder.get_embedding_dim())
-#         vector_store.load()
-#         print("   Vector store loaded successfully")
-#     except Exception as e:
-#         print(f" Failed to load vector store: {e}")
-#         print("Run: python -m scripts.ingest_jobs")
+async def _get_vector_store() -> Optional[VectorStore]:
+    """The resident job index, loading it off the event loop the first time"""
+    global vector_store
+    if vector_store is None:
+        vector_store = await anyio.to_thread.run_sync(_load_vector_store)
+    return vector_store
 
 
-@router.post("/recommend", response_model=JobRecommendationResponse)
+@router.post("/recommend", responses={200: {"model": JobRecommendationResponse}})
 async def get_job_recommendations(request: JobRecommendationRequest):
     """
     Get job recommendations based on resume text.
+    The response is serialized directly; JobRecommendationResponse only documents it.
     """
-    if vector_store is None or embedder is None:
+    vector_store = await _get_vector_store()
+    if vector_store is None:
         raise HTTPException(
             status_code=503,
             detail="Job index not loaded. Please run job ingestion first."
@@ -67,7 +93,7 @@ async def get_job_recommendations(request: JobRecommendationRequest):
     
     try:
         # Generate resume embedding
-        resume_embedding = embedder.embed_text(request.resume_text)
+        resume_embedding = await embed_cache.get_or_compute(request.resume_text)
         
         # Determine experience level
         exp_level = request.experience_level or "entry"
@@ -78,50 +104,47 @@ async def get_job_recommendations(request: JobRecommendationRequest):
             results_intern = vector_store.search(
                 resume_embedding,
                 k=request.top_k,
-                filters={"experience_level": "student"}
+                levels=["student"]
             )
             results_entry = vector_store.search(
                 resume_embedding,
                 k=5,
-                filters={"experience_level": "entry"}
+                levels=["entry"]
             )
-            results = results_intern + results_entry
-            results = sorted(results, key=lambda x: x[1], reverse=True)[:request.top_k]
+            results = heapq.nlargest(request.top_k, results_intern + results_entry, key=itemgetter(1))
         else:
             # Filter by appropriate levels
-            allowed_levels = {
-                "entry": ["entry", "mid"],
-                "mid": ["entry", "mid", "senior"],
-                "senior": ["mid", "senior", "lead"],
-                "lead": ["senior", "lead"]
-            }.get(exp_level, ["mid"])
+            allowed_levels = _ALLOWED_LEVELS.get(exp_level, _DEFAULT_LEVELS)
             
-            all_results = vector_store.search(resume_embedding, k=50)
-            results = [
-                (job, score) for job, score in all_results
-                if job.get('experience_level', 'mid') in allowed_levels
-            ][:request.top_k]
+            results = vector_store.search(
+                resume_embedding,
+                k=request.top_k,
+                levels=allowed_levels
+            )
         
         # Format results
-        matches = []
-        for job, score in results:
-            matches.append(JobMatch(
-                id=job['id'],
-                title=job['title'],
-                company=job['company'],
-                location=job['location'],
-                employment_type=job['employment_type'],
-                experience_level=job.get('experience_level', 'N/A'),
-                match_score=float(score),
-                url=job['url'],
-                description=job.get('description', '')[:500],  # Limit description
-                requirements=job.get('requirements', '')[:300]
-            ))
+        matches = [
+            {
+                "id": job['id'],
+                "title": job['title'],
+                "company": job['company'],
+                "location": job['location'],
+                "employment_type": job['employment_type'],
+                "experience_level": job.get('experience_level', 'N/A'),
+                "match_score": float(score),
+                "url": job['url'],
+                # Metadata indexed before previews existed only has the full texts
+                "description": job.get('description_preview') or (job.get('description') or '')[:DESCRIPTION_PREVIEW_LENGTH],
+                "requirements": job.get('requirements_preview') or (job.get('requirements') or '')[:REQUIREMENTS_PREVIEW_LENGTH]
+            }
+            for job, score in results
+        ]
         
-        return JobRecommendationResponse(
-            experience_level=exp_level,
-            matches=matches
-        )
+        return ORJSONResponse({
+            "candidate_name": None,
+            "experience_level": exp_level,
+            "matches": matches
+        })
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
@@ -130,6 +153,7 @@ async def get_job_recommendations(request: JobRecommendationRequest):
 @router.get("/stats")
 async def get_stats():
     """Get job index statistics"""
+    vector_store = await _get_vector_store()
     if vector_store is None:
         return {"status": "not_loaded"}
     
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+import aiofiles
+import anyio
+import asyncio
 import tempfile
 import os
 import hashlib
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from pydantic import BaseModel
 
 from app.services.text_extractor import (
@@ -15,38 +18,64 @@ from app.services.text_extractor import (
 from app.utils.cleaners import clean_text
 from app.services.resume_parser import parse_resume
 from app.services.job_service import JobService
+from app.services import resume_cache
+from app.services.cpu_pool import run_in_cpu_pool
 from app.models.resume import ResumeProfile
-from app.db.session import get_db
+from app.db.session import get_db, AsyncSessionLocal
 from app.core.config import settings
 
 router = APIRouter(prefix="/resume", tags=["Resume"])
 
+UPLOAD_CHUNK_SIZE = 1 << 20
 
-async def extract_text(file: UploadFile) -> str:
+async def extract_and_parse(file: UploadFile) -> Tuple[str, Dict]:
+    """
+    Extract, clean and parse an uploaded resume. Re-uploads of the same
+    file skip PDF decoding / OCR and parsing and come from resume_cache.
+    """
     suffix = file.filename.split(".")[-1].lower()
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix="." + suffix) as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
+    # Stream the upload to disk in 1 MiB chunks instead of buffering it whole,
+    # hashing it on the way
+    fd, tmp_path = tempfile.mkstemp(suffix="." + suffix)
+    os.close(fd)
+    hasher = hashlib.blake2b(digest_size=16)
 
     try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                hasher.update(chunk)
+                await out.write(chunk)
+
+        file_hash = hasher.hexdigest()
+        cached = resume_cache.get(suffix, file_hash)
+        if cached is not None:
+            print(" Reusing parsed resume from an identical upload")
+            return cached
+
+        # PDF and image extraction can fall back to Tesseract OCR, whose timeout
+        # relies on SIGALRM (main thread only), so they run in worker processes
         if suffix == "pdf":
-            raw = extract_text_from_pdf(tmp_path, use_ocr_fallback=True)
+            raw = await run_in_cpu_pool(extract_text_from_pdf, tmp_path, True)
         elif suffix == "docx":
-            raw = extract_text_from_docx(tmp_path)
+            raw = await anyio.to_thread.run_sync(extract_text_from_docx, tmp_path)
         elif suffix in ["jpg", "jpeg", "png", "tiff", "bmp"]:
-            raw = extract_text_from_image(tmp_path)
+            raw = await run_in_cpu_pool(extract_text_from_image, tmp_path)
         else:
             raise ValueError(f"Unsupported file type: {suffix}")
 
         if len(raw.strip()) < 50:
             raise ValueError("Could not extract sufficient text from document. Please ensure your resume contains readable text.")
 
-        return clean_text(raw)
+        text = await anyio.to_thread.run_sync(clean_text, raw)
 
     finally:
         os.unlink(tmp_path)
 
+    parsed = await run_in_cpu_pool(parse_resume, text)
+    resume_cache.put(suffix, file_hash, text, parsed)
+    return text, parsed
+
 
 @router.post("/quick-parse")
 async def quick_parse_resume(file: UploadFile = File(...)):
@@ -55,10 +84,9 @@ async def quick_parse_resume(file: UploadFile = File(...)):
     Frontend displays skills immediately.
     """
     try:
-        text = await extract_text(file)
-        parsed = parse_resume(text)
+        text, parsed = await extract_and_parse(file)
         
-        resume_hash = hashlib.md5(text.encode()).hexdigest()[:16]
+        resume_hash = hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
         
         print(f" Parsed resume - Skills found: {len(parsed.get('skills', []))}")
         
@@ -117,8 +145,7 @@ async def parse_resume_endpoint(file: UploadFile = File(...)):
     """
     Parse resume only - no job matching.
     """
-    text = await extract_text(file)
-    parsed = parse_resume(text)
+    _, parsed = await extract_and_parse(file)
     return parsed
 
 
@@ -132,8 +159,7 @@ async def upload_resume_and_match(
     Single endpoint: Upload, parse, and get jobs.
     """
     try:
-        text = await extract_text(file)
-        parsed = parse_resume(text)
+        _, parsed = await extract_and_parse(file)
         
         job_service = JobService(db)
         jobs = await job_service.get_jobs_for_resume(parsed, top_k=top_k)
@@ -154,17 +180,23 @@ async def get_cache_stats(db: AsyncSession = Depends(get_db)):
     """Debug endpoint to check cache status"""
     from app.db.models import CachedJob, SearchQuery
     
-    stmt = select(func.count(CachedJob.id))
-    result = await db.execute(stmt)
-    job_count = result.scalar()
+    # Both counts in one round-trip
+    counts_stmt = select(
+        select(func.count(CachedJob.id)).scalar_subquery(),
+        select(func.count(SearchQuery.id)).scalar_subquery()
+    )
     
-    stmt = select(func.count(SearchQuery.id))
-    result = await db.execute(stmt)
-    query_count = result.scalar()
+    async def fetch_sample_jobs():
+        # Separate session: one AsyncSession cannot run queries concurrently
+        async with AsyncSessionLocal() as sample_db:
+            result = await sample_db.execute(select(CachedJob).limit(5))
+            return result.scalars().all()
     
-    stmt = select(CachedJob).limit(5)
-    result = await db.execute(stmt)
-    sample_jobs = result.scalars().all()
+    counts_result, sample_jobs = await asyncio.gather(
+        db.execute(counts_stmt),
+        fetch_sample_jobs()
+    )
+    job_count, query_count = counts_result.one()
     
     return {
         "cache_enabled": settings.ENABLE_CACHE,
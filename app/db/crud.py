@@ -2,66 +2,134 @@
 Database CRUD operations for job caching.
 """
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, and_, func
-from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete, and_, func
+from sqlalchemy.dialects.postgresql import insert
+from datetime import timedelta
 from typing import List, Optional, Dict
-import hashlib
 import json
+import numpy as np
+import xxhash
 
 from app.db.models import CachedJob, SearchQuery, ResumeSearch, UserProfile
 
 
 def generate_query_hash(skills: List[str], experience_level: str, location: str = None) -> str:
-    """Generate consistent hash for search queries"""
+    """Generate consistent hash for search queries (xxh3-128, a cache key not a digest)"""
     skills_str = ",".join(sorted([s.lower().strip() for s in skills]))
     exp_str = experience_level.lower().strip()
     loc_str = (location or "").lower().strip()
     
     query_string = f"{skills_str}|{exp_str}|{loc_str}"
-    return hashlib.sha256(query_string.encode()).hexdigest()
+    return xxhash.xxh3_128_hexdigest(query_string.encode())
 
 
 async def check_cached_jobs(
     db: AsyncSession,
     skills: List[str],
     experience_level: str,
-    location: Optional[str] = None
+    location: Optional[str] = None,
+    embedding_model: Optional[str] = None
 ) -> Optional[List[Dict]]:
     """
     Check if jobs for this query are already cached and not expired.
+    With `embedding_model`, each job also carries its stored "embedding", or
+    None if it was not computed by that model.
     """
     query_hash = generate_query_hash(skills, experience_level, location)
+    now = func.now()
     
-    stmt = select(SearchQuery).where(
-        and_(
-            SearchQuery.query_hash == query_hash,
-            SearchQuery.expires_at > datetime.utcnow()
+    # One round-trip: unexpired jobs whose search query is itself unexpired
+    stmt = (
+        select(CachedJob)
+        .join(SearchQuery, SearchQuery.query_hash == CachedJob.search_query_hash)
+        .where(
+            and_(
+                CachedJob.search_query_hash == query_hash,
+                CachedJob.expires_at > now,
+                SearchQuery.expires_at > now
+            )
         )
     )
     result = await db.execute(stmt)
-    search_query = result.scalar_one_or_none()
+    cached_jobs = result.scalars().all()
     
-    if not search_query:
+    if not cached_jobs:
         return None
     
-    search_query.query_count += 1
-    search_query.last_fetched_at = datetime.utcnow()
+    await _record_query_hit(db, query_hash)
     
-    stmt = select(CachedJob).where(
-        and_(
-            CachedJob.search_query_hash == query_hash,
-            CachedJob.expires_at > datetime.utcnow()
+    if embedding_model is not None:
+        return [
+            {**job_to_dict(job), "embedding": job.embedding if job.embedding_model == embedding_model else None}
+            for job in cached_jobs
+        ]
+    return [job_to_dict(job) for job in cached_jobs]
+
+
+async def search_cached_jobs_by_embedding(
+    db: AsyncSession,
+    query_embedding: np.ndarray,
+    embedding_model: str,
+    skills: List[str],
+    experience_level: str,
+    location: Optional[str] = None,
+    top_k: int = 10
+) -> Optional[List[Dict]]:
+    """
+    Rank unexpired cached jobs for this query by cosine similarity in Postgres
+    (pgvector), returning the top K with `match_score` set.
+    
+    Stored embeddings are L2-normalized, so cosine similarity is the inner
+    product; pgvector's `<#>` operator returns its negation. Rows are found
+    through idx_search_hash_expires and the few dozen candidates are sorted
+    exactly, so the top K is never cut short by an approximate index scan.
+    Only embeddings from `embedding_model` are compared with the query.
+    """
+    query_hash = generate_query_hash(skills, experience_level, location)
+    now = func.now()
+    distance = CachedJob.embedding.max_inner_product(query_embedding)
+    
+    stmt = (
+        select(CachedJob, distance.label("distance"))
+        .join(SearchQuery, SearchQuery.query_hash == CachedJob.search_query_hash)
+        .where(
+            and_(
+                CachedJob.search_query_hash == query_hash,
+                CachedJob.expires_at > now,
+                SearchQuery.expires_at > now,
+                CachedJob.embedding.isnot(None),
+                CachedJob.embedding_model == embedding_model
+            )
         )
+        .order_by(distance)
+        .limit(top_k)
     )
     result = await db.execute(stmt)
-    cached_jobs = result.scalars().all()
+    rows = result.all()
     
-    if not cached_jobs:
+    if not rows:
         return None
     
-    await db.commit()
+    await _record_query_hit(db, query_hash)
     
-    return [job_to_dict(job) for job in cached_jobs]
+    ranked = []
+    for job, dist in rows:
+        job_dict = job_to_dict(job)
+        job_dict['match_score'] = -float(dist)
+        ranked.append(job_dict)
+    
+    return ranked
+
+
+async def _record_query_hit(db: AsyncSession, query_hash: str) -> None:
+    """Bump the hit counter of a cached search query"""
+    stmt = (
+        update(SearchQuery)
+        .where(SearchQuery.query_hash == query_hash)
+        .values(query_count=SearchQuery.query_count + 1, last_fetched_at=func.now())
+    )
+    await db.execute(stmt)
+    await db.commit()
 
 
 async def store_jobs_in_cache(
@@ -70,13 +138,20 @@ async def store_jobs_in_cache(
     skills: List[str],
     experience_level: str,
     location: Optional[str] = None,
-    ttl_days: int = 3
+    ttl_days: int = 3,
+    embeddings: Optional[np.ndarray] = None,
+    embedding_text_hashes: Optional[List[str]] = None,
+    embedding_model: Optional[str] = None
 ) -> None:
     """
     Store fetched jobs in cache with TTL.
+    `embeddings`, if given, holds one row per job and is stored for pgvector search,
+    with `embedding_text_hashes` identifying the text each row was computed from
+    and `embedding_model` the embedder that computed them.
     """
     query_hash = generate_query_hash(skills, experience_level, location)
-    expires_at = datetime.utcnow() + timedelta(days=ttl_days)
+    # Evaluated by Postgres so all expiry comparisons use the server clock
+    expires_at = func.now() + timedelta(days=ttl_days)
     
     stmt = select(SearchQuery).where(SearchQuery.query_hash == query_hash)
     result = await db.execute(stmt)
@@ -84,7 +159,7 @@ async def store_jobs_in_cache(
     
     if search_query:
         search_query.query_count += 1
-        search_query.last_fetched_at = datetime.utcnow()
+        search_query.last_fetched_at = func.now()
         search_query.expires_at = expires_at
     else:
         search_query = SearchQuery(
@@ -99,63 +174,90 @@ async def store_jobs_in_cache(
     
     await db.commit()
     
-    for job in jobs:
-        # Check if job already exists
-        stmt = select(CachedJob).where(CachedJob.id == job['id'])
-        result = await db.execute(stmt)
-        existing_job = result.scalar_one_or_none()
-        
-        if existing_job:
-            # Update existing job
-            existing_job.title = job['title']
-            existing_job.company = job['company']
-            existing_job.location = job.get('location')
-            existing_job.description = job.get('description')
-            existing_job.requirements = job.get('requirements')
-            existing_job.employment_type = job.get('employment_type')
-            existing_job.experience_level = job.get('experience_level')
-            existing_job.url = job.get('url')
-            existing_job.salary_min = job.get('min_salary')
-            existing_job.salary_max = job.get('max_salary')
-            existing_job.is_remote = job.get('is_remote', False)
-            existing_job.search_query_hash = query_hash
-            existing_job.raw_data = job
-            existing_job.expires_at = expires_at
-            existing_job.updated_at = datetime.utcnow()
-        else:
-            # Insert new job
-            cached_job = CachedJob(
-                id=job['id'],
-                title=job['title'],
-                company=job['company'],
-                location=job.get('location'),
-                description=job.get('description'),
-                requirements=job.get('requirements'),
-                employment_type=job.get('employment_type'),
-                experience_level=job.get('experience_level'),
-                url=job.get('url'),
-                salary_min=job.get('min_salary'),
-                salary_max=job.get('max_salary'),
-                is_remote=job.get('is_remote', False),
-                search_query_hash=query_hash,
-                raw_data=job,
-                expires_at=expires_at
-            )
-            db.add(cached_job)
+    # Deduplicate by id: Postgres rejects an upsert touching the same row twice
+    rows = {
+        job['id']: {
+            "id": job['id'],
+            "title": job['title'],
+            "company": job['company'],
+            "location": job.get('location'),
+            "description": job.get('description'),
+            "requirements": job.get('requirements'),
+            "description_preview": job.get('description_preview'),
+            "requirements_preview": job.get('requirements_preview'),
+            "employment_type": job.get('employment_type'),
+            "experience_level": job.get('experience_level'),
+            "url": job.get('url'),
+            "salary_min": job.get('min_salary'),
+            "salary_max": job.get('max_salary'),
+            "is_remote": job.get('is_remote', False),
+            "search_query_hash": query_hash,
+            "raw_data": job,
+            "expires_at": expires_at,
+            **({"embedding": embeddings[i]} if embeddings is not None else {}),
+            **({"embedding_text_hash": embedding_text_hashes[i]} if embedding_text_hashes is not None else {}),
+            **({"embedding_model": embedding_model} if embeddings is not None else {}),
+        }
+        for i, job in enumerate(jobs)
+    }
+    
+    # Without new embeddings, keep whatever embedding a row already has
+    preserved_columns = ('id', 'fetched_at', 'created_at', 'updated_at')
+    if embeddings is None:
+        preserved_columns += ('embedding', 'embedding_text_hash', 'embedding_model')
+    
+    if rows:
+        # Single INSERT ... ON CONFLICT round-trip instead of a SELECT per job
+        stmt = insert(CachedJob).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CachedJob.id],
+            set_={
+                **{
+                    column.name: column
+                    for column in stmt.excluded
+                    if column.name not in preserved_columns
+                },
+                "updated_at": func.now(),
+            }
+        )
+        await db.execute(stmt)
     
     await db.commit()
     print(f"  Stored {len(jobs)} jobs in cache (expires in {ttl_days} days)")
 
 
+async def get_stored_embeddings(db: AsyncSession, text_hashes: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """
+    Stored embeddings that are still current, keyed by job id.
+    `text_hashes` maps job id -> hash of the job's current embedding text;
+    jobs whose text changed since they were stored are left out.
+    """
+    if not text_hashes:
+        return {}
+    
+    stmt = select(CachedJob.id, CachedJob.embedding_text_hash, CachedJob.embedding).where(
+        and_(
+            CachedJob.id.in_(list(text_hashes)),
+            CachedJob.embedding.isnot(None)
+        )
+    )
+    result = await db.execute(stmt)
+    return {
+        job_id: embedding
+        for job_id, text_hash, embedding in result.all()
+        if text_hash == text_hashes[job_id]
+    }
+
+
 async def cleanup_expired_jobs(db: AsyncSession) -> int:
     """
     Delete expired jobs from cache.
     """
-    stmt = delete(CachedJob).where(CachedJob.expires_at <= datetime.utcnow())
+    stmt = delete(CachedJob).where(CachedJob.expires_at <= func.now())
     result = await db.execute(stmt)
     jobs_deleted = result.rowcount
     
-    stmt = delete(SearchQuery).where(SearchQuery.expires_at <= datetime.utcnow())
+    stmt = delete(SearchQuery).where(SearchQuery.expires_at <= func.now())
     await db.execute(stmt)
     
     await db.commit()
@@ -195,6 +297,8 @@ def job_to_dict(job: CachedJob) -> Dict:
         "location": job.location,
         "description": job.description,
         "requirements": job.requirements,
+        "description_preview": job.description_preview,
+        "requirements_preview": job.requirements_preview,
         "employment_type": job.employment_type,
         "experience_level": job.experience_level,
         "url": job.url,
@@ -220,7 +324,7 @@ async def save_user_profile(db: AsyncSession, user_id: str, parsed_resume: Dict)
         profile.seeking_internship = exp_info.get('seeking_internship', False)
         profile.education = parsed_resume.get('education', [])
         profile.projects = parsed_resume.get('projects', [])
-        profile.updated_at = datetime.utcnow()
+        profile.updated_at = func.now()
     else:
         profile = UserProfile(
             user_id=user_id,
@@ -1,13 +1,16 @@
 """
 SQLAlchemy models for job caching.
 """
-from sqlalchemy import Column, String, Text, TIMESTAMP, Integer, DECIMAL, Boolean, Index
+from sqlalchemy import Column, String, Text, TIMESTAMP, Integer, DECIMAL, Boolean, Index, func
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from datetime import datetime
+from pgvector.sqlalchemy import Vector
+from app.core.config import settings
 
 Base = declarative_base()
 
+EMBEDDING_DIM = settings.EMBEDDING_DIM
+
 
 class CachedJob(Base):
     """Cached job postings with TTL"""
@@ -19,6 +22,8 @@ class CachedJob(Base):
     location = Column(String(255))
     description = Column(Text)
     requirements = Column(Text)
+    description_preview = Column(String(500))
+    requirements_preview = Column(String(300))
     employment_type = Column(String(50))
     experience_level = Column(String(50))
     url = Column(Text)
@@ -29,15 +34,22 @@ class CachedJob(Base):
     # Search metadata
     search_query_hash = Column(String(64), nullable=False, index=True)
     raw_data = Column(JSONB)
+    embedding = Column(Vector(EMBEDDING_DIM))
+    embedding_text_hash = Column(String(16))  # Hash of the model + text `embedding` was computed from
+    embedding_model = Column(String(255))  # Embedder model_key (backend:model) `embedding` came from
     
     # TTL fields
-    fetched_at = Column(TIMESTAMP, default=datetime.utcnow)
+    fetched_at = Column(TIMESTAMP, server_default=func.now())
     expires_at = Column(TIMESTAMP, nullable=False, index=True)
-    created_at = Column(TIMESTAMP, default=datetime.utcnow)
-    updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
     __table_args__ = (
         Index('idx_search_exp_level', 'search_query_hash', 'experience_level'),
+        # Embedding search filters on the query hash first and sorts the
+        # few dozen matching rows exactly, so no ANN index on `embedding`:
+        # its post-filtered scan could return fewer than top_k rows
+        Index('idx_search_hash_expires', 'search_query_hash', 'expires_at'),
     )
 
 
@@ -57,9 +69,9 @@ class SearchQuery(Base):
     
     # Metadata
     query_count = Column(Integer, default=1)
-    last_fetched_at = Column(TIMESTAMP, default=datetime.utcnow)
+    last_fetched_at = Column(TIMESTAMP, server_default=func.now())
     expires_at = Column(TIMESTAMP, nullable=False)
-    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    created_at = Column(TIMESTAMP, server_default=func.now())
 
 
 class ResumeSearch(Base):
@@ -72,7 +84,7 @@ class ResumeSearch(Base):
     experience_level = Column(String(50))
     skills = Column(ARRAY(Text))
     results_count = Column(Integer)
-    searched_at = Column(TIMESTAMP, default=datetime.utcnow)
+    searched_at = Column(TIMESTAMP, server_default=func.now())
 class UserProfile(Base):
     __tablename__ = "user_profiles"
     
@@ -88,5 +100,5 @@ class UserProfile(Base):
     education = Column(JSONB)
     projects = Column(JSONB)
     raw_resume_text = Column(Text)
-    created_at = Column(TIMESTAMP, default=datetime.utcnow)
-    updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
\ No newline at end of file
@@ -1,3 +1,8 @@
+-- pgvector for job embedding search
+-- VECTOR(384) below must match settings.EMBEDDING_DIM (init_db creates the
+-- tables from the models, which read the setting; this file is for manual setup)
+CREATE EXTENSION IF NOT EXISTS vector;
+
 -- Job cache table with TTL
 CREATE TABLE IF NOT EXISTS cached_jobs (
     id VARCHAR(255) PRIMARY KEY,
@@ -6,6 +11,8 @@ CREATE TABLE IF NOT EXISTS cached_jobs (
     location VARCHAR(255),
     description TEXT,
     requirements TEXT,
+    description_preview VARCHAR(500),
+    requirements_preview VARCHAR(300),
     employment_type VARCHAR(50),
     experience_level VARCHAR(50),
     url TEXT,
@@ -15,6 +22,9 @@ CREATE TABLE IF NOT EXISTS cached_jobs (
     -- Search metadata
     search_query_hash VARCHAR(64) NOT NULL,  -- Hash of the search criteria
     raw_data JSONB,  -- Store full job JSON
+    embedding VECTOR(384),  -- Job embedding for pgvector ranking
+    embedding_text_hash VARCHAR(16),  -- Hash of the model + text the embedding was computed from
+    embedding_model VARCHAR(255),  -- Embedder backend:model the embedding came from
     
     -- TTL fields
     fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -25,10 +35,21 @@ CREATE TABLE IF NOT EXISTS cached_jobs (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Columns for tables created before they existed
+ALTER TABLE cached_jobs ADD COLUMN IF NOT EXISTS description_preview VARCHAR(500);
+ALTER TABLE cached_jobs ADD COLUMN IF NOT EXISTS requirements_preview VARCHAR(300);
+ALTER TABLE cached_jobs ADD COLUMN IF NOT EXISTS embedding VECTOR(384);
+ALTER TABLE cached_jobs ADD COLUMN IF NOT EXISTS embedding_text_hash VARCHAR(16);
+ALTER TABLE cached_jobs ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(255);
+
 -- Index for efficient search query lookups
 CREATE INDEX IF NOT EXISTS idx_search_query_hash ON cached_jobs(search_query_hash);
 CREATE INDEX IF NOT EXISTS idx_expires_at ON cached_jobs(expires_at);
 CREATE INDEX IF NOT EXISTS idx_experience_level ON cached_jobs(experience_level);
+-- Embedding ranking filters by search_query_hash through this index and then
+-- sorts the matching rows exactly; an HNSW index on embedding would apply that
+-- filter after its approximate scan and could return too few rows
+CREATE INDEX IF NOT EXISTS idx_search_hash_expires ON cached_jobs(search_query_hash, expires_at);
 
 -- Search query cache table (tracks what queries have been made)
 CREATE TABLE IF NOT EXISTS search_queries (
@@ -6,9 +6,17 @@ engine = create_async_engine(
     echo=settings.DEBUG,
     future=True,
     pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
     pool_recycle=3600,
+    connect_args={
+        # asyncpg per-connection prepared statement cache
+        "statement_cache_size": 1024,
+        # SQLAlchemy's cache of asyncpg prepared statements
+        "prepared_statement_cache_size": 512,
+        # Short OLTP queries only pay JIT compile cost, never benefit
+        "server_settings": {"jit": "off"},
+    },
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -41,11 +49,27 @@ async def test_db_connection():
         print(f"Database connection failed: {e}")
         raise
 
+# Schema added after the first release; create_all does not alter existing tables
+SCHEMA_UPGRADES = [
+    "ALTER TABLE cached_jobs ADD COLUMN IF NOT EXISTS description_preview VARCHAR(500)",
+    "ALTER TABLE cached_jobs ADD COLUMN IF NOT EXISTS requirements_preview VARCHAR(300)",
+    f"ALTER TABLE cached_jobs ADD COLUMN IF NOT EXISTS embedding vector({settings.EMBEDDING_DIM})",
+    "ALTER TABLE cached_jobs ADD COLUMN IF NOT EXISTS embedding_text_hash VARCHAR(16)",
+    "ALTER TABLE cached_jobs ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(255)",
+    "CREATE INDEX IF NOT EXISTS idx_search_hash_expires ON cached_jobs (search_query_hash, expires_at)",
+    "DROP INDEX IF EXISTS idx_cached_jobs_embedding",
+    "DROP INDEX IF EXISTS idx_cached_jobs_embedding_ip",
+]
+
 async def init_db():
     from app.db.models import Base
+    from sqlalchemy import text
     try:
         async with engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
             await conn.run_sync(Base.metadata.create_all)
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
         print("Database initialized")
     except Exception as e:
         print(f"Database initialization warning: {e}")
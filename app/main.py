@@ -1,11 +1,14 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 import os
 
 from app.api import resume, jobs, search
 from app.db.session import init_db, test_db_connection
 from app.services.scheduler import start_scheduler, stop_scheduler
+from app.services.cpu_pool import shutdown_cpu_pool
+from app.services.job_fetcher import close_async_client
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -26,12 +29,15 @@ async def lifespan(app: FastAPI):
     
     print("Shutting down...")
     stop_scheduler()
+    shutdown_cpu_pool()
+    await close_async_client()
 
 app = FastAPI(
     title="Job Recommendation Platform",
     description="Smart job matching with resume-based caching",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 allowed_origins = [
@@ -0,0 +1,45 @@
+"""
+Process pool for CPU-bound resume extraction and parsing.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+
+from app.core.config import settings
+
+
+_cpu_pool = None
+
+
+def _init_worker():
+    """Load the parser (spaCy model, regex tables) once per worker process"""
+    import app.services.resume_parser  # noqa: F401
+    import app.services.text_extractor  # noqa: F401
+
+
+def get_cpu_pool() -> ProcessPoolExecutor:
+    """
+    Get or create the shared pool. Workers are spawned rather than forked:
+    the parent already runs embedding runtime threads, which fork can deadlock.
+    """
+    global _cpu_pool
+    if _cpu_pool is None:
+        _cpu_pool = ProcessPoolExecutor(
+            max_workers=max(1, settings.CPU_POOL_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+    return _cpu_pool
+
+
+async def run_in_cpu_pool(func, *args):
+    """Run func(*args) in the pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_pool(), func, *args)
+
+
+def shutdown_cpu_pool():
+    global _cpu_pool
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
@@ -0,0 +1,37 @@
+"""
+In-process LRU cache of text embeddings keyed by content hash.
+"""
+from collections import OrderedDict
+import hashlib
+import numpy as np
+
+from app.services.embedder import get_batching_embedder
+from app.core.config import settings
+
+
+_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+
+def _cache_key(text: str) -> str:
+    """Content hash of the text (BLAKE2b is faster than MD5/SHA-256 here)"""
+    return "emb:" + hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+async def get_or_compute(text: str) -> np.ndarray:
+    """
+    Return the embedding for text, running the model only on a cache miss.
+    """
+    key = _cache_key(text)
+    
+    embedding = _cache.get(key)
+    if embedding is not None:
+        _cache.move_to_end(key)
+        return embedding
+    
+    embedding = await get_batching_embedder().embed(text)
+    
+    _cache[key] = embedding
+    if len(_cache) > settings.EMBEDDING_CACHE_SIZE:
+        _cache.popitem(last=False)
+    
+    return embedding
@@ -1,23 +1,135 @@
 """
 Embedding generation using SentenceTransformers.
 """
-from sentence_transformers import SentenceTransformer
-from typing import List, Union
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+from sentence_transformers.quantization import quantize_embeddings
+from pathlib import Path
+import atexit
+import contextlib
+from typing import List, Optional, Union
+import asyncio
 import numpy as np
+import xxhash
 from app.core.config import settings
+from app.services.similarity import quantize_int8
+
+# Output dtypes accepted by Embedder.embed_batch (None is float32)
+EMBEDDING_DTYPES = (None, "fp16", "int8", "binary")
 
 
 class Embedder:
-    """Generate embeddings for text using SentenceTransformer"""
+    """
+    Generate embeddings for text using SentenceTransformer, or Model2Vec
+    static embeddings (a token lookup + mean, no transformer forward pass).
+    
+    Resume and job vectors are only comparable when both come from the same
+    model, so the backend applies to every embedding call site, not just bulk
+    job embedding.
+    """
+    
+    def __init__(self, model_name: str = None, backend: str = None):
+        """
+        Initialize embedder with specified model and inference backend.
+        """
+        self.backend = backend or settings.EMBEDDING_BACKEND
+        default_model = settings.EMBEDDING_STATIC_MODEL if self.backend == "model2vec" else settings.EMBEDDING_MODEL
+        self.model_name = model_name or default_model
+        print(f"Loading embedding model: {self.model_name} ({self.backend} backend)...")
+        self.model = self._load_model()
+        print(f"Model loaded. Embedding dimension: {self.get_embedding_dim()}")
+        self._disk_cache = self._open_disk_cache()
+        self._pool = None
+    
+    def _load_model(self):
+        """Load the model on the configured backend, falling back to PyTorch"""
+        if self.backend == "model2vec":
+            from model2vec import StaticModel
+            return StaticModel.from_pretrained(self.model_name)
+        
+        if self.backend == "onnx":
+            try:
+                return self._load_onnx_model()
+            except Exception as e:
+                print(f"ONNX backend unavailable ({e}), falling back to PyTorch")
+                self.backend = "torch"
+        
+        return self._optimize_torch_model(SentenceTransformer(self.model_name))
     
-    def __init__(self, model_name: str = None):
+    @staticmethod
+    def _optimize_torch_model(model: SentenceTransformer) -> SentenceTransformer:
         """
-        Initialize embedder with specified model.
+        On CUDA, run the PyTorch model in fp16 and compile the transformer.
+        fp16 shifts cosine scores by ~1e-3, which doesn't change the ranking.
+        On CPU the defaults already apply: oneDNN is enabled and torch uses
+        one intra-op thread per physical core.
         """
-        self.model_name = model_name or settings.EMBEDDING_MODEL
-        print(f"Loading embedding model: {self.model_name}...")
-        self.model = SentenceTransformer(self.model_name)
-        print(f"Model loaded. Embedding dimension: {self.model.get_sentence_embedding_dimension()}")
+        import torch
+        
+        if not (settings.EMBEDDING_TORCH_FP16 and torch.cuda.is_available()):
+            return model
+        
+        print("CUDA available: using fp16 weights and torch.compile")
+        model = model.half()
+        transformer = model[0]
+        # Compiled modules can't be shipped to the multi-GPU pool's workers
+        if hasattr(transformer, "auto_model") and torch.cuda.device_count() == 1:
+            # dynamic=True: one graph for every batch shape instead of a recompile per length
+            transformer.auto_model = torch.compile(transformer.auto_model, dynamic=True)
+        return model
+    
+    def _load_onnx_model(self) -> SentenceTransformer:
+        """
+        Load int8 ONNX weights: the pre-quantized file from the model repo if
+        it ships one, otherwise a dynamically quantized export cached on disk.
+        """
+        model_kwargs = {"provider": "CPUExecutionProvider"}
+        
+        try:
+            return SentenceTransformer(
+                self.model_name,
+                backend="onnx",
+                model_kwargs={**model_kwargs, "file_name": settings.EMBEDDING_ONNX_FILE}
+            )
+        except Exception as e:
+            print(f"No pre-quantized ONNX weights for {self.model_name} ({e})")
+        
+        quantization = settings.EMBEDDING_ONNX_QUANTIZATION
+        export_dir = Path(settings.EMBEDDING_ONNX_CACHE_DIR) / self.model_name.replace("/", "__")
+        quantized_file = f"onnx/model_qint8_{quantization}.onnx"
+        
+        if not (export_dir / quantized_file).exists():
+            print(f"Exporting {quantization} int8 ONNX model to {export_dir}...")
+            model = SentenceTransformer(self.model_name, backend="onnx")
+            model.save(str(export_dir))
+            export_dynamic_quantized_onnx_model(
+                model,
+                quantization_config=quantization,
+                model_name_or_path=str(export_dir)
+            )
+        
+        return SentenceTransformer(
+            str(export_dir),
+            backend="onnx",
+            model_kwargs={**model_kwargs, "file_name": quantized_file}
+        )
+    
+    def _open_disk_cache(self):
+        """Open the on-disk embedding cache, if EMBEDDING_DISK_CACHE_DIR is set"""
+        if not settings.EMBEDDING_DISK_CACHE_DIR:
+            return None
+        
+        import diskcache
+        print(f"Using embedding disk cache at {settings.EMBEDDING_DISK_CACHE_DIR}")
+        return diskcache.Cache(settings.EMBEDDING_DISK_CACHE_DIR)
+    
+    @property
+    def model_key(self) -> str:
+        """Backend and model that produce this embedder's vectors"""
+        return f"{self.backend}:{self.model_name}"
+    
+    def _cache_key(self, text: str) -> str:
+        """Content hash of a text, scoped to the backend and model that embed it"""
+        return xxhash.xxh3_128_hexdigest(f"{self.model_key}\0{text}".encode())
     
     def embed_text(self, text: str) -> np.ndarray:
         """
@@ -26,33 +138,162 @@ class Embedder:
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
         
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding
+        return self.embed_batch([text], show_progress=False)[0]
     
-    def embed_batch(self, texts: List[str], batch_size: int = 32, show_progress: bool = True) -> np.ndarray:
+    def embed_batch(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        show_progress: bool = True,
+        dtype: Optional[str] = None
+    ) -> np.ndarray:
         """
-        Generate embeddings for multiple texts efficiently.
+        Generate normalized embeddings for multiple texts efficiently.
+        
+        dtype=None returns float32; "fp16" halves the size, "int8" quarters it
+        and "binary" packs sign bits into uint8 (32x smaller, compared by
+        Hamming distance).
         """
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        
         if not texts:
             raise ValueError("Text list cannot be empty")
         
-        # Filter out empty texts
-        valid_texts = [t for t in texts if t and t.strip()]
+        # Skip empty texts, remembering where the real ones sit
+        valid_idx = []
+        valid_texts = []
+        for i, t in enumerate(texts):
+            if t and t.strip():
+                valid_idx.append(i)
+                valid_texts.append(t)
         
+        if not valid_texts:
+            print(f"All {len(texts)} texts are empty, returning zero vectors")
+            embeddings = np.zeros((len(texts), self.get_embedding_dim()), dtype=np.float32)
+            return self._convert(embeddings, dtype)
+        
+        embeddings = self._embed_cached(valid_texts, batch_size, show_progress)
+        
+        # Zero vectors at empty positions keep output rows aligned with texts
         if len(valid_texts) != len(texts):
             print(f"Filtered out {len(texts) - len(valid_texts)} empty texts")
+            aligned = np.zeros((len(texts), embeddings.shape[1]), dtype=embeddings.dtype)
+            aligned[valid_idx] = embeddings
+            embeddings = aligned
         
-        embeddings = self.model.encode(
-            valid_texts,
-            batch_size=batch_size,
-            show_progress_bar=show_progress,
-            convert_to_numpy=True
-        )
+        return self._convert(embeddings, dtype)
+    
+    def _embed_cached(self, texts: List[str], batch_size: int, show_progress: bool) -> np.ndarray:
+        """Encode texts, serving repeats from the disk cache when it is enabled"""
+        if self._disk_cache is None:
+            return self._encode(texts, batch_size, show_progress)
+        
+        # Only run the model on texts we haven't embedded before
+        keys = [self._cache_key(t) for t in texts]
+        embeddings = [self._disk_cache.get(key) for key in keys]
+        misses = [i for i, emb in enumerate(embeddings) if emb is None]
+        
+        if misses:
+            computed = self._encode([texts[i] for i in misses], batch_size, show_progress)
+            with self._disk_cache.transact():
+                for i, emb in zip(misses, computed):
+                    self._disk_cache.set(keys[i], emb)
+                    embeddings[i] = emb
+        
+        return np.stack(embeddings)
+    
+    @staticmethod
+    def _convert(embeddings: np.ndarray, dtype: Optional[str]) -> np.ndarray:
+        """Convert float32 embeddings to the requested output dtype"""
+        if dtype == "fp16":
+            return embeddings.astype(np.float16)
+        if dtype == "int8":
+            return quantize_int8(embeddings)
+        if dtype == "binary":
+            return quantize_embeddings(embeddings, precision="ubinary")
+        return embeddings
+    
+    def _encode(self, texts: List[str], batch_size: int, show_progress: bool) -> np.ndarray:
+        """Run the model on texts and return L2-normalized embeddings"""
+        if self.backend == "model2vec":
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=show_progress
+            )
+            # Texts with no in-vocabulary token embed to all zeros; keep
+            # them zero (as normalize_embeddings does) rather than NaN
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            return embeddings / np.maximum(norms, 1e-12)
+        
+        # No need to pre-sort by length: encode() already orders texts by
+        # length before batching (so each batch pads to a similar max length)
+        # and restores the input order in its output
+        if len(texts) >= settings.EMBEDDING_MULTI_GPU_THRESHOLD and self._gpu_count() > 1:
+            return self.embed_batch_multi_gpu(texts, batch_size)
+        
+        with self._inference_context():
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=show_progress,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
         
         return embeddings
     
+    @contextlib.contextmanager
+    def _inference_context(self):
+        """
+        For the PyTorch backend, run under torch.inference_mode() (cheaper
+        than the no_grad() encode() uses: no version counters or autograd
+        metadata). Also, with EMBEDDING_TORCH_CPU_BF16 set, BF16 autocast on CPU;
+        only worth it on CPUs with native BF16 (AMX / AVX512-BF16). The
+        weights stay fp32 and cosine scores stay within ~1e-3 of fp32.
+        """
+        if self.backend != "torch":
+            yield
+            return
+        
+        import torch
+        with torch.inference_mode():
+            if settings.EMBEDDING_TORCH_CPU_BF16 and self.model.device.type == "cpu":
+                with torch.autocast("cpu", dtype=torch.bfloat16):
+                    yield
+            else:
+                yield
+    
+    def _gpu_count(self) -> int:
+        """Visible CUDA devices; only the PyTorch backend can use them"""
+        if self.backend != "torch":
+            return 0
+        import torch
+        return torch.cuda.device_count()
+    
+    def embed_batch_multi_gpu(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Encode a large corpus across every visible GPU, with one worker
+        process per device (sentence-transformers' multi-process pool).
+        The pool is started on first use and stopped at interpreter exit.
+        """
+        if self._pool is None:
+            print(f"Starting multi-GPU encode pool on {self._gpu_count()} devices...")
+            self._pool = self.model.start_multi_process_pool()
+            atexit.register(self.model.stop_multi_process_pool, self._pool)
+        
+        return self.model.encode_multi_process(
+            texts,
+            self._pool,
+            batch_size=batch_size,
+            normalize_embeddings=True
+        )
+    
     def get_embedding_dim(self) -> int:
         """Get the dimensionality of embeddings"""
+        if self.backend == "model2vec":
+            return self.model.dim
         return self.model.get_sentence_embedding_dimension()
 
 
@@ -64,4 +305,80 @@ def get_embedder() -> Embedder:
     global _embedder_instance
     if _embedder_instance is None:
         _embedder_instance = Embedder()
-    return _embedder_instance
\ No newline at end of file
+    return _embedder_instance
+
+
+class BatchingEmbedder:
+    """
+    Coalesce concurrent single-text embedding requests into one model call.
+    
+    Callers await `embed()`; a background task drains the queue for up to
+    `max_wait_ms` (or until `max_batch_size` texts are waiting) and encodes
+    them together, since the model is far more efficient at batch 32 than
+    at batch 1.
+    """
+    
+    def __init__(self, embedder: Embedder = None, max_batch_size: int = 32, max_wait_ms: float = 8):
+        self.embedder = embedder or get_embedder()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._worker = None
+    
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Generate embedding for a single text as part of a micro-batch.
+        """
+        if not text or not text.strip():
+            raise ValueError("Text cannot be empty")
+        
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+    
+    async def _run(self):
+        """Background task: collect a batch, encode it off-loop, resolve futures"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await loop.run_in_executor(
+                    None,
+                    lambda: self.embedder.embed_batch(texts, batch_size=len(texts), show_progress=False)
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+
+_batching_embedder_instance = None
+
+def get_batching_embedder() -> BatchingEmbedder:
+    """Get or create the shared micro-batching embedder"""
+    global _batching_embedder_instance
+    if _batching_embedder_instance is None:
+        _batching_embedder_instance = BatchingEmbedder()
+    return _batching_embedder_instance
@@ -1,35 +1,57 @@
+import io
 import re
+from functools import lru_cache
 from typing import List, Dict
 
+from app.utils.matching import build_automaton, iter_matches
+
+_TECH_STACK_RE = re.compile(r'^(Tech Stack:|Technologies:|Stack:|Built with:)\s*')
+_BULLET_STRIP_RE = re.compile(r'^[•◦\-\*]\s*')
+_YEAR_RE = re.compile(r'^\d{4}$')
+_COURSEWORK_PREFIX_RE = re.compile(r'^Relevant Coursework:\s*', re.IGNORECASE)
+_SPLIT_RE = re.compile(r'\t+|\s{2,}')
+
+_BULLET_CHARS = frozenset({'•', '◦', '-', '*'})
+_DEGREE_KEYWORDS = ("bachelor", "master", "phd", "b.tech", "m.tech",
+                    "b.s.", "m.s.", "b.a.", "m.a.", "cgpa", "gpa", "%")
+_INSTITUTION_KEYWORDS = ("institute", "university", "school", "college", "academy")
+
+
+@lru_cache(maxsize=8)
+def _skill_automaton(skills: frozenset):
+    return build_automaton(skills)
+
 
 def extract_skills_from_section(content: str, skill_dict: set) -> List[str]:
-    content_lower = content.lower()
-    found = []
+    # One Aho-Corasick pass over the text instead of a substring scan per skill.
+    # Whole words only, so "go" doesn't match inside "golang"; compound terms
+    # like "react-native" still match "react"
+    automaton = _skill_automaton(frozenset(skill_dict))
+    found = {skill for _, skill in iter_matches(automaton, content.lower(), whole_words=True)}
     
-    for skill in skill_dict:
-        # Match whole words or as part of compound terms
-        if skill in content_lower:
-            found.append(skill)
-    
-    return sorted(set(found))
+    return sorted(found)
+
+
+def _close_project(project: Dict) -> Dict[str, str]:
+    """Join the accumulated description lines of a finished project"""
+    project["description"] = " ".join(project.pop("_desc_parts"))
+    return project
 
 
 def extract_projects_from_section(content: str) -> List[Dict[str, str]]:
     projects = []
-    lines = content.split("\n")
     
     current_project = None
     seen_tech_stack = False
     
-    for i, line in enumerate(lines):
+    # Iterate lines lazily rather than materializing content.split("\n")
+    for line in io.StringIO(content):
         stripped = line.strip()
         
         # Skip empty lines
         if not stripped:
             if current_project and current_project.get("title"):
-                if not current_project.get("description"):
-                    current_project["description"] = ""
-                projects.append(current_project)
+                projects.append(_close_project(current_project))
                 current_project = None
                 seen_tech_stack = False
             continue
@@ -38,7 +60,7 @@ def extract_projects_from_section(content: str) -> List[Dict[str, str]]:
         if stripped in ['§', '(cid:239)']:
             continue
         
-        is_bullet = stripped.startswith(('•', '◦', '-', '*'))
+        is_bullet = stripped[:1] in _BULLET_CHARS
         
         # Check if it's an explicit tech stack line
         is_tech_stack_explicit = stripped.startswith(('Tech Stack:', 'Technologies:', 'Stack:', 'Built with:'))
@@ -66,13 +88,14 @@ def extract_projects_from_section(content: str) -> List[Dict[str, str]]:
             current_project = {
                 "title": stripped,
                 "technologies": "",
-                "description": ""
+                "description": "",
+                "_desc_parts": []
             }
             seen_tech_stack = False
         
         elif is_tech_stack_explicit and current_project:
             # Explicit tech stack
-            tech_line = re.sub(r'^(Tech Stack:|Technologies:|Stack:|Built with:)\s*', '', stripped)
+            tech_line = _TECH_STACK_RE.sub('', stripped)
             current_project["technologies"] = tech_line.strip()
             seen_tech_stack = True
         
@@ -82,20 +105,19 @@ def extract_projects_from_section(content: str) -> List[Dict[str, str]]:
             seen_tech_stack = True
         
         elif is_bullet and current_project:
-            desc_line = re.sub(r'^[•◦\-\*]\s*', '', stripped)
-            if current_project["description"]:
-                current_project["description"] += " "
-            current_project["description"] += desc_line
+            desc_line = _BULLET_STRIP_RE.sub('', stripped)
+            # Joined with spaces when the project closes; empty bullets
+            # before the first real one add nothing
+            if current_project["_desc_parts"] or desc_line:
+                current_project["_desc_parts"].append(desc_line)
         
-        elif current_project and current_project.get("description"):
+        elif current_project and current_project["_desc_parts"]:
             # Continuation of previous bullet 
-            current_project["description"] += " " + stripped
+            current_project["_desc_parts"].append(stripped)
     
     # Save last project
     if current_project and current_project.get("title"):
-        if not current_project.get("description"):
-            current_project["description"] = ""
-        projects.append(current_project)
+        projects.append(_close_project(current_project))
     
     # Final validation
     valid_projects = []
@@ -117,30 +139,30 @@ def extract_projects_from_section(content: str) -> List[Dict[str, str]]:
 
 def extract_education_from_section(content: str) -> List[Dict[str, str]]:
     education = []
-    lines = content.split("\n")
     
     current_entry = None
+    # Field lines are collected and joined once at the end
+    degree_parts = []
+    detail_parts = []
     
-    for line in lines:
+    for line in io.StringIO(content):
         stripped = line.strip()
         if not stripped:
             continue
+        lower = stripped.lower()
         
         # Check if line contains degree/score keywords
-        degree_keywords = ["bachelor", "master", "phd", "b.tech", "m.tech", 
-                          "b.s.", "m.s.", "b.a.", "m.a.", "cgpa", "gpa", "%"]
-        has_degree_info = any(keyword in stripped.lower() for keyword in degree_keywords)
+        has_degree_info = any(keyword in lower for keyword in _DEGREE_KEYWORDS)
         
         # Check if it's a graduation year/expected graduation line
         is_graduation_info = (
-            "graduation" in stripped.lower() or
-            "expected" in stripped.lower() or
-            re.match(r'^\d{4}$', stripped)  # Just a year
+            "graduation" in lower or
+            "expected" in lower or
+            _YEAR_RE.match(stripped)  # Just a year
         )
        
-        institution_keywords = ["institute", "university", "school", "college", "academy"]
         looks_like_institution = (
-            any(keyword in stripped.lower() for keyword in institution_keywords) or
+            any(keyword in lower for keyword in _INSTITUTION_KEYWORDS) or
             (stripped.istitle() and len(stripped.split()) >= 2 and not has_degree_info)
         )
         
@@ -154,24 +176,20 @@ def extract_education_from_section(content: str) -> List[Dict[str, str]]:
         
         elif current_entry and has_degree_info:
             # Add to degree field
-            if current_entry["degree"]:
-                current_entry["degree"] += " "
-            current_entry["degree"] += stripped
+            degree_parts.append(stripped)
         
         elif current_entry and is_graduation_info:
             # Add to details field
-            if current_entry["details"]:
-                current_entry["details"] += " "
-            current_entry["details"] += stripped
+            detail_parts.append(stripped)
         
         elif current_entry:
             # Additional info 
-            if current_entry["details"]:
-                current_entry["details"] += " "
-            current_entry["details"] += stripped
+            detail_parts.append(stripped)
     
     # Add last entry
     if current_entry:
+        current_entry["degree"] = " ".join(degree_parts)
+        current_entry["details"] = " ".join(detail_parts)
         education.append(current_entry)
     
     return education
@@ -181,7 +199,7 @@ def extract_coursework(content: str) -> List[str]:
     
     courses = []
     
-    content = re.sub(r'^Relevant Coursework:\s*', '', content, flags=re.IGNORECASE)
+    content = _COURSEWORK_PREFIX_RE.sub('', content)
     
     if ',' in content:
         # Split by commas
@@ -189,21 +207,19 @@ def extract_coursework(content: str) -> List[str]:
         for part in parts:
             cleaned = part.strip()
             # Remove bullet points
-            cleaned = re.sub(r'^[•◦\-\*]\s*', '', cleaned)
+            cleaned = _BULLET_STRIP_RE.sub('', cleaned)
             # Skip empty or very long (likely not course names)
             if cleaned and len(cleaned.split()) <= 10:
                 courses.append(cleaned)
     else:
         # Split by newlines and bullets
-        lines = content.split("\n")
-        
-        for line in lines:
+        for line in io.StringIO(content):
             stripped = line.strip()
             if not stripped:
                 continue
             
             # Remove bullet points
-            cleaned = re.sub(r'^[•◦\-\*]\s*', '', stripped)
+            cleaned = _BULLET_STRIP_RE.sub('', stripped)
             
             # Skip if it's empty after cleaning
             if not cleaned:
@@ -211,7 +227,7 @@ def extract_coursework(content: str) -> List[str]:
             
             # If line has multiple courses separated by tabs/spaces 
             if '\t' in cleaned or '  ' in cleaned:
-                parts = re.split(r'\t+|\s{2,}', cleaned)
+                parts = _SPLIT_RE.split(cleaned)
                 for part in parts:
                     part = part.strip()
                     if part and len(part.split()) <= 10:
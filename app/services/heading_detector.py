@@ -1,53 +1,58 @@
 import re
 
+_BULLET_RE = re.compile(r'^[•\-\*]\s*')
+_DATE_RE = re.compile(r'^[A-Z][a-z]{2,8}\.?\s+\d{4}|^\d{4}|\d{4}\s*[–-]\s*\d{4}|\d{4}\s*[–-]\s*[A-Z]')
+
+_HEADING_KEYWORDS = (
+    "experience", "education", "skills", "projects", 
+    "coursework", "certifications", "activities", "summary",
+    "objective", "awards", "publications", "leadership",
+    "extra-curricular", "extracurricular", "technical"
+)
+_HEADING_KEYWORD_SET = frozenset(_HEADING_KEYWORDS)
+
+
 def is_heading(line: str) -> bool:
     stripped = line.strip()
     
     if not stripped:
         return False
     
-    # Remove bullet points for analysis
-    cleaned = re.sub(r'^[•\-\*]\s*', '', stripped)
+    # Cheap character tests first; most body lines fail one of these
+    # Ends with punctuation → likely a sentence, not a heading
+    if stripped[-1] in ".,;":
+        return False
+    
+    # Skip if it contains common non-heading patterns (email, phone, parentheses)
+    if any(c in stripped for c in "@+()"):
+        return False
     
     # Skip if it's a bullet point 
-    if stripped.startswith(('•', '-', '*')) and ':' in stripped:
+    is_bullet = stripped[0] in "•-*"
+    if is_bullet and ':' in stripped:
         return False
     
+    # Remove bullet points for analysis
+    cleaned = _BULLET_RE.sub('', stripped) if is_bullet else stripped
+    
     word_count = len(cleaned.split())
     if word_count > 5:
         return False
     
     # Skip if it's just a date or date range
-    date_pattern = r'^[A-Z][a-z]{2,8}\.?\s+\d{4}|^\d{4}|\d{4}\s*[–-]\s*\d{4}|\d{4}\s*[–-]\s*[A-Z]'
-    if re.search(date_pattern, stripped):
-        return False
-    
-    # Skip if it contains common non-heading patterns
-    if re.search(r'[@\+\(\)]', stripped):  # Email, phone, parentheses
+    if _DATE_RE.search(stripped):
         return False
     
-    # Ends with punctuation → likely a sentence, not a heading
-    if re.search(r"[.,;]$", stripped):
-        return False
-    
-    # Check for common heading keywords
-    heading_keywords = [
-        "experience", "education", "skills", "projects", 
-        "coursework", "certifications", "activities", "summary",
-        "objective", "awards", "publications", "leadership",
-        "extra-curricular", "extracurricular", "technical"
-    ]
-    
     lower_text = cleaned.lower()
-    has_keyword = any(keyword in lower_text for keyword in heading_keywords)
     
     if cleaned.isupper() and word_count <= 4:
         return True
     
-    if cleaned.istitle() and has_keyword:
+    if lower_text in _HEADING_KEYWORD_SET:
         return True
     
-    if lower_text in heading_keywords:
+    # Check for common heading keywords
+    if cleaned.istitle() and any(keyword in lower_text for keyword in _HEADING_KEYWORDS):
         return True
     
-    return False
\ No newline at end of file
+    return False
@@ -2,8 +2,35 @@
 Job text cleaning and normalization for embeddings.
 """
 import re
-from typing import Dict
-from bs4 import BeautifulSoup
+from typing import Dict, Optional
+from selectolax.lexbor import LexborHTMLParser
+
+_WS_RE = re.compile(r'\s+')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+_SPECIAL_RE = re.compile(r'[^a-zA-Z0-9\s.,\-+#/]')
+_SKILL_RE = re.compile(
+    r'\b(?:python|java|javascript|c\+\+|sql|react|node\.js'
+    r'|aws|azure|gcp|docker|kubernetes'
+    r'|machine learning|ml|ai|data science'
+    r'|bachelor|master|phd|degree)\b',
+    re.IGNORECASE,
+)
+# Elements that break the text flow; inline tags (b, a, span...) join their
+# neighbours directly so "Pyth<b>on</b>" stays "Python"
+_BLOCK_SELECTOR = (
+    "p, div, br, li, ul, ol, dt, dd, tr, td, th, table, blockquote, pre, "
+    "section, article, header, footer, h1, h2, h3, h4, h5, h6"
+)
+
+# Experience level keywords; titles are matched as whole tokens
+_TITLE_TOKEN_RE = re.compile(r'[a-z0-9+]+')
+_STUDENT_TITLE_WORDS = frozenset({'intern', 'interns', 'internship', 'internships', 'student', 'students'})
+_ENTRY_TITLE_WORDS = frozenset({'junior', 'entry', 'graduate', 'associate'})
+_ENTRY_PHRASES = ('new grad', '0-2 years')
+_ENTRY_DESCRIPTION_KEYWORDS = ('junior', 'entry', 'graduate', 'associate') + _ENTRY_PHRASES
+_SENIOR_TITLE_WORDS = frozenset({'senior', 'sr', 'lead', 'leader', 'principal', 'staff'})
+_SENIOR_PHRASES = ('7+ years', '8+ years')
+_LEAD_TITLE_WORDS = frozenset({'architect', 'director'})
 
 
 class JobCleaner:
@@ -11,60 +38,74 @@ class JobCleaner:
     @staticmethod
     def clean_html(text: str) -> str:
         """Remove HTML tags and entities"""
+        return JobCleaner._clean_and_truncate(text)
+    
+    @staticmethod
+    def _clean_and_truncate(text: str, max_len: Optional[int] = None) -> str:
+        """
+        Strip HTML, collapse whitespace and truncate to max_len in one pass.
+        The result is already normalized, so callers don't re-run
+        normalize_whitespace on it.
+        """
         if not text:
             return ""
         
-        # Parse HTML
-        soup = BeautifulSoup(text, "html.parser")
+        # Parse HTML (Lexbor C parser) and drop non-visible content
+        parser = LexborHTMLParser(text)
+        parser.strip_tags(["script", "style"])
         
-        # Get text
-        text = soup.get_text()
+        # Separate block-level elements only, then take the text as written
+        for node in parser.css(_BLOCK_SELECTOR):
+            node.insert_before(" ")
+            node.insert_after(" ")
+        text = parser.text(separator='')
         
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
+        # Collapse whitespace runs and trim the ends in a single C-level pass
+        text = ' '.join(text.split())
         
-        return text.strip()
+        if max_len is not None and len(text) > max_len:
+            text = text[:max_len] + "..."
+        
+        return text
     
     @staticmethod
     def normalize_whitespace(text: str) -> str:
         """Normalize all whitespace"""
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        text = _WS_RE.sub(' ', text)
+        text = _BLANK_LINES_RE.sub('\n\n', text)
         return text.strip()
     
     @staticmethod
     def remove_special_chars(text: str) -> str:
         """Remove special characters but keep important punctuation"""
-        text = re.sub(r'[^a-zA-Z0-9\s.,\-+#/]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
+        text = _SPECIAL_RE.sub(' ', text)
+        text = _WS_RE.sub(' ', text)
         return text.strip()
     @staticmethod
     def classify_job_level(job: Dict) -> str:
         """
         Classify job experience level from title and description.
         """
-        title = job.get('title', '').lower()
-        description = job.get('description', '').lower()
-        
-        text = title + ' ' + description
+        title = (job.get('title') or '').lower()
+        title_tokens = set(_TITLE_TOKEN_RE.findall(title))
         
         # Student/Intern level
-        if any(keyword in title for keyword in ['intern', 'internship', 'student', 'co-op']):
+        if title_tokens & _STUDENT_TITLE_WORDS or 'co-op' in title:
             return "student"
         
-        # Entry level
-        entry_keywords = ['junior', 'entry', 'graduate', 'associate', 'new grad', '0-2 years']
-        if any(keyword in text for keyword in entry_keywords):
+        # Entry level (the description is only scanned if the title is inconclusive)
+        if title_tokens & _ENTRY_TITLE_WORDS or any(p in title for p in _ENTRY_PHRASES):
+            return "entry"
+        description = (job.get('description') or '').lower()
+        if any(keyword in description for keyword in _ENTRY_DESCRIPTION_KEYWORDS):
             return "entry"
         
         # Senior level
-        senior_keywords = ['senior', 'sr.', 'sr ', 'lead', 'principal', 'staff', '7+ years', '8+ years']
-        if any(keyword in title for keyword in senior_keywords):
+        if title_tokens & _SENIOR_TITLE_WORDS or any(p in title for p in _SENIOR_PHRASES):
             return "senior"
         
-        # Lead level
-        lead_keywords = ['lead', 'principal', 'staff', 'architect', 'director', '10+ years']
-        if any(keyword in title for keyword in lead_keywords):
+        # Lead level (lead/principal/staff titles are already senior above)
+        if title_tokens & _LEAD_TITLE_WORDS or '10+ years' in title:
             return "lead"
         
         # Default to mid-level
@@ -76,41 +117,29 @@ class JobCleaner:
         """
         parts = []
         
-        # Title 
-        if job.get("title"):
-            parts.append(f"Job Title: {job['title']}")
-        
-        # Company
-        if job.get("company"):
-            parts.append(f"Company: {job['company']}")
-        
-        # Location
-        if job.get("location"):
-            parts.append(f"Location: {job['location']}")
-        
-        # Employment Type
-        if job.get("employment_type"):
-            parts.append(f"Type: {job['employment_type']}")
-        
-        # Clean description
-        if job.get("description"):
-            clean_desc = JobCleaner.clean_html(job["description"])
-            clean_desc = JobCleaner.normalize_whitespace(clean_desc)
-            # Limit description length for embedding 
-            if len(clean_desc) > 1000:
-                clean_desc = clean_desc[:1000] + "..."
+        # Short fields: title, company, location, employment type
+        for label, key in (
+            ("Job Title", "title"),
+            ("Company", "company"),
+            ("Location", "location"),
+            ("Type", "employment_type"),
+        ):
+            value = job.get(key)
+            if value:
+                parts.append(f"{label}: {' '.join(str(value).split())}")
+        
+        # Clean description, limited in length for embedding
+        clean_desc = JobCleaner._clean_and_truncate(job.get("description"), max_len=1000)
+        if clean_desc:
             parts.append(f"Description: {clean_desc}")
         
         # Requirements
-        if job.get("requirements"):
-            clean_req = JobCleaner.clean_html(job["requirements"])
-            clean_req = JobCleaner.normalize_whitespace(clean_req)
+        clean_req = JobCleaner._clean_and_truncate(job.get("requirements"))
+        if clean_req:
             parts.append(f"Requirements: {clean_req}")
         
-        # Join all parts
-        full_text = "\n\n".join(parts)
-        
-        return JobCleaner.normalize_whitespace(full_text)
+        # Parts are already normalized, a single space keeps the old output
+        return " ".join(parts)
     
     @staticmethod
     def extract_keywords(job: Dict) -> list:
@@ -120,17 +149,7 @@ class JobCleaner:
         text = job.get("description", "") + " " + job.get("requirements", "")
         text = JobCleaner.clean_html(text).lower()
         
-        # Common skill patterns
-        skill_patterns = [
-            r'\b(?:python|java|javascript|c\+\+|sql|react|node\.js)\b',
-            r'\b(?:aws|azure|gcp|docker|kubernetes)\b',
-            r'\b(?:machine learning|ml|ai|data science)\b',
-            r'\b(?:bachelor|master|phd|degree)\b',
-        ]
-        
-        keywords = set()
-        for pattern in skill_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            keywords.update(matches)
+        # Single scan for all common skill patterns
+        keywords = set(_SKILL_RE.findall(text))
         
         return list(keywords)
\ No newline at end of file
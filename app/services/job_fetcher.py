@@ -1,7 +1,57 @@
+import asyncio
+import httpx
+import orjson
 import requests
-import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from app.core.config import settings
+from app.services.job_cleaner import JobCleaner
+
+DESCRIPTION_PREVIEW_LENGTH = 500
+REQUIREMENTS_PREVIEW_LENGTH = 300
+
+# Retry policy shared by the requests session and the async client
+_MAX_RETRIES = 3
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Shared by every JobFetcher, so the TLS / HTTP/2 connection to the API
+# host stays open between fetches instead of being set up per request
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Get or create the shared async client"""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            http2=True,
+            timeout=30,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=4)
+        )
+    return _async_client
+
+
+async def close_async_client():
+    """Close the shared client (on app shutdown)"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+# (normalized key, JSearch key, default) for fields copied straight across
+_FIELD_MAP = (
+    ("id", "job_id", ""),
+    ("title", "job_title", ""),
+    ("company", "employer_name", ""),
+    ("employment_type", "job_employment_type", "FULLTIME"),
+    ("url", "job_apply_link", ""),
+    ("posted_date", "job_posted_at_datetime_utc", ""),
+    ("min_salary", "job_min_salary", None),
+    ("max_salary", "job_max_salary", None),
+    ("is_remote", "job_is_remote", False),
+)
 
 class JobFetcher:
     def __init__(self):
@@ -11,6 +61,22 @@ class JobFetcher:
         
         if not self.api_key or self.api_key == "":
             raise ValueError("RAPIDAPI_KEY not configured")
+        
+        # One keep-alive session for every page; the adapter retries
+        # rate limits and server errors, honoring Retry-After
+        self.session = requests.Session()
+        retry = Retry(
+            total=_MAX_RETRIES,
+            backoff_factor=1.0,
+            status_forcelist=_RETRY_STATUSES,
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "X-RapidAPI-Key": self.api_key,
+            "X-RapidAPI-Host": self.api_host
+        })
     
     def fetch_jobs(
         self, 
@@ -20,24 +86,63 @@ class JobFetcher:
         employment_types: Optional[str] = None,
         experience_level: Optional[str] = None
     ) -> List[Dict]:
-        if experience_level == "student":
-            query = f"{query} intern OR internship OR student"
-        elif experience_level == "entry":
-            query = f"{query} junior OR entry level OR graduate"
-        elif experience_level == "senior":
-            query = f"{query} senior OR lead"
-        elif experience_level == "lead":
-            query = f"{query} lead OR principal OR staff"
+        url = f"{self.base_url}/search"
+        param_list = self._build_page_params(query, location, num_pages, employment_types, experience_level)
         
+        # Fetch all pages concurrently; map() keeps results in page order
+        with ThreadPoolExecutor(max_workers=min(num_pages, 4)) as executor:
+            pages = executor.map(lambda params: self._fetch_page(url, params), param_list)
+            raw_jobs = [job for page_jobs in pages for job in page_jobs]
+        
+        return self._normalize_batch(raw_jobs)
+    
+    async def fetch_jobs_async(
+        self, 
+        query: str = "software engineer",
+        location: Optional[str] = None,
+        num_pages: int = 1,
+        employment_types: Optional[str] = None,
+        experience_level: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Async fetch_jobs: every page is requested concurrently on one HTTP/2
+        connection, without tying up a worker thread per page. The connection
+        is pooled and reused by later fetches.
+        """
         url = f"{self.base_url}/search"
+        param_list = self._build_page_params(query, location, num_pages, employment_types, experience_level)
         
         headers = {
             "X-RapidAPI-Key": self.api_key,
             "X-RapidAPI-Host": self.api_host
         }
+        client = get_async_client()
+        pages = await asyncio.gather(
+            *(self._fetch_page_async(client, url, params, headers) for params in param_list)
+        )
         
-        all_jobs = []
+        raw_jobs = [job for page_jobs in pages for job in page_jobs]
+        return self._normalize_batch(raw_jobs)
+    
+    def _build_page_params(
+        self,
+        query: str,
+        location: Optional[str],
+        num_pages: int,
+        employment_types: Optional[str],
+        experience_level: Optional[str]
+    ) -> List[Dict]:
+        """Query params for each result page, with the query tuned to the level"""
+        if experience_level == "student":
+            query = f"{query} intern OR internship OR student"
+        elif experience_level == "entry":
+            query = f"{query} junior OR entry level OR graduate"
+        elif experience_level == "senior":
+            query = f"{query} senior OR lead"
+        elif experience_level == "lead":
+            query = f"{query} lead OR principal OR staff"
         
+        param_list = []
         for page in range(1, num_pages + 1):
             params = {
                 "query": query,
@@ -51,63 +156,105 @@ class JobFetcher:
             if employment_types:
                 params["employment_types"] = employment_types
             
-            try:
-                response = requests.get(url, headers=headers, params=params, timeout=30)
-                response.raise_for_status()
-                
-                data = response.json()
-                jobs = data.get("data", [])
-                
-                normalized_jobs = [self._normalize_job(job) for job in jobs]
-                all_jobs.extend(normalized_jobs)
-                
-                print(f"Fetched {len(jobs)} jobs from page {page}")
-                
-                if page < num_pages:
-                    time.sleep(1)
-                
-            except requests.exceptions.Timeout:
-                print(f"Timeout on page {page}, continuing...")
-                continue
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 429:
-                    print(f"Rate limit reached. Stopping.")
-                    break
-                elif e.response.status_code >= 500:
-                    print(f"Server error on page {page}: {e}")
-                    continue
-                else:
-                    print(f"HTTP Error on page {page}: {e}")
+            param_list.append(params)
+        
+        return param_list
+    
+    def _fetch_page(self, url: str, params: Dict) -> List[Dict]:
+        """Fetch a single result page of raw jobs, returning [] on failure"""
+        page = params["page"]
+        
+        try:
+            response = self.session.get(url, params=params, timeout=30)
+            response.raise_for_status()
+            
+            data = orjson.loads(response.content)
+            jobs = data.get("data", [])
+            
+            print(f"Fetched {len(jobs)} jobs from page {page}")
+            return jobs
+            
+        except requests.exceptions.Timeout:
+            print(f"Timeout on page {page}, skipping...")
+        except requests.exceptions.RetryError as e:
+            print(f"Retries exhausted on page {page} (rate limit or server errors): {e}")
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code >= 500:
+                print(f"Server error on page {page}: {e}")
+            else:
+                print(f"HTTP Error on page {page}: {e}")
+        except requests.exceptions.RequestException as e:
+            print(f"Request error on page {page}: {e}")
+        except Exception as e:
+            print(f"Unexpected error on page {page}: {e}")
+        
+        return []
+    
+    async def _fetch_page_async(
+        self,
+        client: "httpx.AsyncClient",
+        url: str,
+        params: Dict,
+        headers: Dict
+    ) -> List[Dict]:
+        """
+        Async _fetch_page. Retries rate limits and server errors like the
+        session's Retry adapter: 3 retries, exponential backoff or Retry-After.
+        """
+        page = params["page"]
+        
+        try:
+            for attempt in range(_MAX_RETRIES + 1):
+                response = await client.get(url, params=params, headers=headers)
+                if response.status_code not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
                     break
-            except requests.exceptions.RequestException as e:
-                print(f"Request error on page {page}: {e}")
-                continue
-            except Exception as e:
-                print(f"Unexpected error on page {page}: {e}")
-                continue
+                
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else 2 ** attempt
+                await asyncio.sleep(delay)
+            
+            response.raise_for_status()
+            
+            data = orjson.loads(response.content)
+            jobs = data.get("data", [])
+            
+            print(f"Fetched {len(jobs)} jobs from page {page}")
+            return jobs
+            
+        except httpx.TimeoutException:
+            print(f"Timeout on page {page}, skipping...")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in _RETRY_STATUSES:
+                print(f"Retries exhausted on page {page} (rate limit or server errors): {e}")
+            else:
+                print(f"HTTP Error on page {page}: {e}")
+        except httpx.HTTPError as e:
+            print(f"Request error on page {page}: {e}")
+        except Exception as e:
+            print(f"Unexpected error on page {page}: {e}")
         
-        return all_jobs
+        return []
+    
+    def _normalize_batch(self, raw_jobs: List[Dict]) -> List[Dict]:
+        """Normalize every fetched job in one pass, dropping ones that fail"""
+        normalized = [self._normalize_job(job) for job in raw_jobs]
+        return [job for job in normalized if job is not None]
     
     def _normalize_job(self, raw_job: Dict) -> Dict:
-        from app.services.job_cleaner import JobCleaner
-        
         try:
-            normalized = {
-                "id": raw_job.get("job_id", ""),
-                "title": raw_job.get("job_title", ""),
-                "company": raw_job.get("employer_name", ""),
-                "location": self._format_location(raw_job),
-                "description": raw_job.get("job_description", ""),
-                "requirements": self._extract_requirements(raw_job),
-                "employment_type": raw_job.get("job_employment_type", "FULLTIME"),
-                "url": raw_job.get("job_apply_link", ""),
-                "posted_date": raw_job.get("job_posted_at_datetime_utc", ""),
-                "min_salary": raw_job.get("job_min_salary"),
-                "max_salary": raw_job.get("job_max_salary"),
-                "is_remote": raw_job.get("job_is_remote", False),
-                "raw": raw_job
-            }
+            description = raw_job.get("job_description") or ""
+            requirements = self._extract_requirements(raw_job)
             
+            normalized = {out: raw_job.get(src, default) for out, src, default in _FIELD_MAP}
+            normalized.update(
+                location=self._format_location(raw_job),
+                description=description,
+                requirements=requirements,
+                # Truncated once here so responses never slice full texts
+                description_preview=description[:DESCRIPTION_PREVIEW_LENGTH],
+                requirements_preview=requirements[:REQUIREMENTS_PREVIEW_LENGTH],
+                raw=raw_job
+            )
             normalized["experience_level"] = JobCleaner.classify_job_level(normalized)
             return normalized
         except Exception as e:
@@ -1,16 +1,23 @@
 """
 Job service with intelligent caching.
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
 import hashlib
+import re
+import anyio
 import numpy as np
 
 from app.services.job_fetcher import JobFetcher
-from app.services.embedder import get_embedder
+from app.services import embed_cache, rank_cache
+from app.services.embedder import get_embedder, get_batching_embedder
+from app.services.similarity import similarities
 from app.db.crud import (
     check_cached_jobs,
+    search_cached_jobs_by_embedding,
     store_jobs_in_cache,
+    get_stored_embeddings,
     generate_query_hash,
     log_resume_search
 )
@@ -46,24 +53,46 @@ class JobService:
         
         # Generate resume hash for logging
         resume_text = parsed_resume.get('raw_text', '')
-        resume_hash = hashlib.md5(resume_text.encode()).hexdigest()[:16]
+        resume_hash = hashlib.blake2b(resume_text.encode(), digest_size=8).hexdigest()
+        query_hash = generate_query_hash(skills, experience_level, settings.DEFAULT_LOCATION)
         
-        # Check cache first
+        # Same resume, same query a few minutes ago: reuse that ranking
+        # without embedding the resume again
+        use_rank_cache = settings.ENABLE_CACHE and bool(resume_text)
+        if use_rank_cache:
+            ranked_jobs = rank_cache.get(query_hash, resume_hash, top_k)
+            if ranked_jobs is not None:
+                print(f" Reusing {len(ranked_jobs)} recently ranked jobs")
+                await log_resume_search(
+                    self.db,
+                    resume_hash=resume_hash,
+                    query_hash=query_hash,
+                    experience_level=experience_level,
+                    skills=skills,
+                    results_count=len(ranked_jobs)
+                )
+                return ranked_jobs
+        
+        resume_embedding = await self._embed_resume(parsed_resume)
+        
+        # Check cache first - ranked inside Postgres via pgvector
         if settings.ENABLE_CACHE:
-            cached_jobs = await check_cached_jobs(
+            ranked_jobs = await search_cached_jobs_by_embedding(
                 self.db,
+                query_embedding=resume_embedding,
+                embedding_model=self.embedder.model_key,
                 skills=skills,
                 experience_level=experience_level,
-                location=settings.DEFAULT_LOCATION
+                location=settings.DEFAULT_LOCATION,
+                top_k=top_k
             )
             
-            if cached_jobs:
-                print(f" Found {len(cached_jobs)} cached jobs")
-                # Rank cached jobs against resume
-                ranked_jobs = await self._rank_jobs(cached_jobs, parsed_resume, top_k)
+            if ranked_jobs:
+                print(f" Found {len(ranked_jobs)} cached jobs")
+                if use_rank_cache:
+                    rank_cache.put(query_hash, resume_hash, top_k, ranked_jobs)
                 
                 # Log search
-                query_hash = generate_query_hash(skills, experience_level, settings.DEFAULT_LOCATION)
                 await log_resume_search(
                     self.db,
                     resume_hash=resume_hash,
@@ -83,6 +112,8 @@ class JobService:
             print(" No jobs found from API")
             return []
         
+        job_embeddings, text_hashes = await self._embed_fetched_jobs(jobs)
+        
         # Store in cache
         if settings.ENABLE_CACHE:
             await store_jobs_in_cache(
@@ -91,14 +122,18 @@ class JobService:
                 skills=skills,
                 experience_level=experience_level,
                 location=settings.DEFAULT_LOCATION,
-                ttl_days=settings.JOB_CACHE_TTL_DAYS
+                ttl_days=settings.JOB_CACHE_TTL_DAYS,
+                embeddings=job_embeddings,
+                embedding_text_hashes=text_hashes,
+                embedding_model=self.embedder.model_key
             )
         
         # Rank and return
-        ranked_jobs = await self._rank_jobs(jobs, parsed_resume, top_k)
+        ranked_jobs = self._score_jobs(jobs, job_embeddings, resume_embedding, top_k)
+        if use_rank_cache:
+            rank_cache.put(query_hash, resume_hash, top_k, ranked_jobs)
         
         # Log search
-        query_hash = generate_query_hash(skills, experience_level, settings.DEFAULT_LOCATION)
         await log_resume_search(
             self.db,
             resume_hash=resume_hash,
@@ -119,8 +154,8 @@ class JobService:
         # Create search query from top skills
         query = " OR ".join(skills[:5])  # Use top 5 skills
         
-        # Fetch jobs
-        jobs = self.fetcher.fetch_jobs(
+        # Fetch jobs, all pages concurrently
+        jobs = await self.fetcher.fetch_jobs_async(
             query=query,
             location=settings.DEFAULT_LOCATION,
             num_pages=3,  # Fetch ~30 jobs
@@ -132,41 +167,111 @@ class JobService:
     async def _rank_jobs(
         self,
         jobs: List[Dict],
-        parsed_resume: Dict,
+        resume_embedding: np.ndarray,
         top_k: int
     ) -> List[Dict]:
         """
-        Rank jobs against resume using embeddings.
+        Rank jobs against a precomputed resume embedding.
         """
         if not jobs:
             return []
         
-        # Create resume embedding text
+        job_embeddings = await self._embed_jobs(jobs)
+        return self._score_jobs(jobs, job_embeddings, resume_embedding, top_k)
+    
+    async def _embed_resume(self, parsed_resume: Dict) -> np.ndarray:
+        """Embed the resume's structured summary, reusing it on repeat uploads"""
         resume_text = self._create_resume_embedding_text(parsed_resume)
-        resume_embedding = self.embedder.embed_text(resume_text)
+        return await embed_cache.get_or_compute(resume_text)
+    
+    async def _embed_fetched_jobs(self, jobs: List[Dict]) -> Tuple[np.ndarray, List[str]]:
+        """
+        Embed freshly fetched jobs, reusing the stored embedding of any job
+        already cached with the same embedding text, so a re-fetch only
+        embeds new or changed postings. Returns the embeddings and the hash
+        of each job's embedding text.
+        """
+        texts = await anyio.to_thread.run_sync(self._job_embedding_texts, jobs)
+        # Scoped by backend and model like the embedder's disk cache, so
+        # vectors from a different model are never mixed with new ones
+        model_key = f"{self.embedder.model_key}\0"
+        text_hashes = [
+            hashlib.blake2b((model_key + text).encode(), digest_size=8).hexdigest()
+            for text in texts
+        ]
         
-        # Create job embeddings
-        from app.services.job_cleaner import JobCleaner
-        cleaner = JobCleaner()
+        if settings.ENABLE_CACHE:
+            stored = await get_stored_embeddings(
+                self.db, {job['id']: text_hash for job, text_hash in zip(jobs, text_hashes)}
+            )
+            if stored:
+                print(f" Reusing stored embeddings for {len(stored)} of {len(jobs)} jobs")
+            for job in jobs:
+                if job['id'] in stored:
+                    job['embedding'] = stored[job['id']]
         
-        job_texts = [cleaner.create_embedding_text(job) for job in jobs]
-        job_embeddings = self.embedder.embed_batch(job_texts)
+        return await self._embed_jobs(jobs, texts), text_hashes
+    
+    async def _embed_jobs(self, jobs: List[Dict], texts: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Embed jobs, one row per job. Jobs loaded from the cache carry their
+        stored "embedding", which is used (and removed) instead of re-embedding.
+        `texts`, if given, are the jobs' already-built embedding texts.
+        """
+        embeddings = [job.pop('embedding', None) for job in jobs]
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
         
-        # Calculate similarity scores (cosine similarity)
-        # Normalize vectors
-        resume_norm = resume_embedding / np.linalg.norm(resume_embedding)
-        job_norms = job_embeddings / np.linalg.norm(job_embeddings, axis=1, keepdims=True)
+        if missing:
+            missing_jobs = [jobs[i] for i in missing]
+            if texts is not None:
+                texts = [texts[i] for i in missing]
+            elif len(missing_jobs) < settings.SMALL_EMBED_BATCH:
+                texts = self._job_embedding_texts(missing_jobs)
+            
+            if texts and len(texts) < settings.SMALL_EMBED_BATCH and all(text.strip() for text in texts):
+                # Too few texts to be worth a batch of their own: join the
+                # shared micro-batch alongside other requests' texts
+                computed = await asyncio.gather(*(get_batching_embedder().embed(text) for text in texts))
+            elif texts is not None:
+                computed = await anyio.to_thread.run_sync(self.embedder.embed_batch, texts)
+            else:
+                computed = await anyio.to_thread.run_sync(self._embed_job_batch, missing_jobs)
+            for i, emb in zip(missing, computed):
+                embeddings[i] = emb
         
-        # Calculate similarities
-        similarities = np.dot(job_norms, resume_norm)
+        return np.stack(embeddings).astype(np.float32, copy=False)
+    
+    def _job_embedding_texts(self, jobs: List[Dict]) -> List[str]:
+        """Cleaned embedding text for each job"""
+        from app.services.job_cleaner import JobCleaner
+        cleaner = JobCleaner()
+        return [cleaner.create_embedding_text(job) for job in jobs]
+    
+    def _embed_job_batch(self, jobs: List[Dict]) -> np.ndarray:
+        """Clean and embed jobs as one batch (blocking; run in a worker thread)"""
+        return self.embedder.embed_batch(self._job_embedding_texts(jobs))
+    
+    def _score_jobs(
+        self,
+        jobs: List[Dict],
+        job_embeddings: np.ndarray,
+        resume_embedding: np.ndarray,
+        top_k: int
+    ) -> List[Dict]:
+        """Return the top K jobs, each a copy carrying its match score"""
+        # Cosine similarity, or Hamming similarity for binary embeddings.
+        # Both come from embed_batch, which L2-normalizes them
+        scores = similarities(resume_embedding, job_embeddings, normalized=True)
         
-        # Add scores to jobs and sort
-        for job, score in zip(jobs, similarities):
-            job['match_score'] = float(score)
+        # Partial selection of the top K, then sort only those K
+        if top_k < len(scores):
+            top = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
         
-        # Sort by score and return top K
-        ranked = sorted(jobs, key=lambda x: x['match_score'], reverse=True)
-        return ranked[:top_k]
+        return [dict(jobs[i], match_score=float(scores[i])) for i in top]
+    
     async def search_jobs_by_query(
     self,
     search_context: Dict,
@@ -180,51 +285,74 @@ class JobService:
         experience_level = search_context.get('experience_level', 'entry')
         query = search_context.get('query', '')
         
-        # Check cache first
-        if settings.ENABLE_CACHE:
-            cached_jobs = await check_cached_jobs(
-                self.db,
-                skills=skills[:5],  # Top 5 skills for cache key
-                experience_level=experience_level,
-                location=settings.DEFAULT_LOCATION
-            )
+        # The profile embedding doesn't depend on the jobs, so compute it
+        # while the cache lookup / API fetch are in flight
+        resume_task = asyncio.create_task(self._embed_resume(search_context))
+        try:
+            # Check cache first
+            if settings.ENABLE_CACHE:
+                cached_jobs = await check_cached_jobs(
+                    self.db,
+                    skills=skills[:5],  # Top 5 skills for cache key
+                    experience_level=experience_level,
+                    location=settings.DEFAULT_LOCATION,
+                    embedding_model=self.embedder.model_key
+                )
+                
+                if cached_jobs:
+                    # Filter cached jobs by query
+                    filtered = self._filter_by_query(cached_jobs, query)
+                    if len(filtered) >= top_k:
+                        return await self._rank_jobs(filtered, await resume_task, top_k)
             
-            if cached_jobs:
-                # Filter cached jobs by query
-                filtered = self._filter_by_query(cached_jobs, query)
-                if len(filtered) >= top_k:
-                    return await self._rank_jobs(filtered, search_context, top_k)
-        
-        # Fetch new jobs combining query + skills
-        combined_query = f"{query} {' OR '.join(skills[:3])}"
-        jobs = self.fetcher.fetch_jobs(
-            query=combined_query,
-            location=settings.DEFAULT_LOCATION,
-            num_pages=3,
-            experience_level=experience_level
-        )
-        
-        # Cache the results
-        if settings.ENABLE_CACHE and jobs:
-            await store_jobs_in_cache(
-                self.db,
-                jobs=jobs,
-                skills=skills,
-                experience_level=experience_level,
+            # Fetch new jobs combining query + skills
+            combined_query = f"{query} {' OR '.join(skills[:3])}"
+            jobs = await self.fetcher.fetch_jobs_async(
+                query=combined_query,
                 location=settings.DEFAULT_LOCATION,
-                ttl_days=settings.JOB_CACHE_TTL_DAYS
+                num_pages=3,
+                experience_level=experience_level
             )
-        
-        # Rank and return
-        return await self._rank_jobs(jobs, search_context, top_k)
+            
+            if not jobs:
+                return []
+            
+            # Embed once: the vectors are cached with the jobs and used for ranking
+            job_embeddings, text_hashes = await self._embed_fetched_jobs(jobs)
+            
+            # Cache the results
+            if settings.ENABLE_CACHE:
+                await store_jobs_in_cache(
+                    self.db,
+                    jobs=jobs,
+                    skills=skills,
+                    experience_level=experience_level,
+                    location=settings.DEFAULT_LOCATION,
+                    ttl_days=settings.JOB_CACHE_TTL_DAYS,
+                    embeddings=job_embeddings,
+                    embedding_text_hashes=text_hashes,
+                    embedding_model=self.embedder.model_key
+                )
+            
+            # Rank and return
+            return self._score_jobs(jobs, job_embeddings, await resume_task, top_k)
+        finally:
+            # Stops the embedding on early returns and errors. A task that
+            # already failed has its exception retrieved, so asyncio doesn't
+            # log "Task exception was never retrieved"
+            if not resume_task.done():
+                resume_task.cancel()
+            elif not resume_task.cancelled():
+                resume_task.exception()
 
     def _filter_by_query(self, jobs: List[Dict], query: str) -> List[Dict]:
         """Filter jobs by query string in title/description"""
-        query_lower = query.lower()
+        # Case-insensitive search without lowercasing every description
+        pattern = re.compile(re.escape(query), re.IGNORECASE)
         return [
             job for job in jobs
-            if query_lower in job.get('title', '').lower() or
-            query_lower in job.get('description', '').lower()
+            if pattern.search(job.get('title') or '') or
+            pattern.search(job.get('description') or '')
         ]
     def _create_resume_embedding_text(self, parsed_resume: Dict) -> str:
         """Create text representation of resume for embedding"""
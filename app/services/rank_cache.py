@@ -0,0 +1,39 @@
+"""
+Short-lived in-process cache of ranked results per (query, resume).
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import time
+
+from app.core.config import settings
+
+
+# (query_hash, resume_hash, top_k) -> (stored_at, ranked jobs)
+_cache: "OrderedDict[Tuple[str, str, int], Tuple[float, List[Dict]]]" = OrderedDict()
+
+
+def get(query_hash: str, resume_hash: str, top_k: int) -> Optional[List[Dict]]:
+    """
+    Ranked jobs from a recent identical request, or None if absent/expired.
+    """
+    key = (query_hash, resume_hash, top_k)
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    
+    stored_at, ranked_jobs = entry
+    if time.monotonic() - stored_at > settings.RANK_CACHE_TTL_SECONDS:
+        del _cache[key]
+        return None
+    
+    _cache.move_to_end(key)
+    return [dict(job) for job in ranked_jobs]
+
+
+def put(query_hash: str, resume_hash: str, top_k: int, ranked_jobs: List[Dict]) -> None:
+    """Remember a ranking, evicting the least recently used entry when full"""
+    key = (query_hash, resume_hash, top_k)
+    _cache[key] = (time.monotonic(), [dict(job) for job in ranked_jobs])
+    _cache.move_to_end(key)
+    if len(_cache) > settings.RANK_CACHE_SIZE:
+        _cache.popitem(last=False)
@@ -0,0 +1,35 @@
+"""
+In-process LRU cache of extracted + parsed resumes per uploaded file.
+"""
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import copy
+
+from app.core.config import settings
+
+
+# (file type, hash of the file's bytes) -> (cleaned text, parsed resume)
+_cache: "OrderedDict[Tuple[str, str], Tuple[str, Dict]]" = OrderedDict()
+
+
+def get(suffix: str, file_hash: str) -> Optional[Tuple[str, Dict]]:
+    """
+    Text and parsed resume of an identical earlier upload, or None.
+    """
+    key = (suffix, file_hash)
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    
+    _cache.move_to_end(key)
+    text, parsed = entry
+    return text, copy.deepcopy(parsed)
+
+
+def put(suffix: str, file_hash: str, text: str, parsed: Dict) -> None:
+    """Remember a parsed upload, evicting the least recently used entry when full"""
+    key = (suffix, file_hash)
+    _cache[key] = (text, copy.deepcopy(parsed))
+    _cache.move_to_end(key)
+    if len(_cache) > settings.RESUME_CACHE_SIZE:
+        _cache.popitem(last=False)
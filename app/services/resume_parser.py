@@ -13,23 +13,55 @@ from .extractors import (
 EMAIL_REGEX = r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"
 PHONE_REGEX = r"(?:\+?\d{1,3}[\s\-]?)?\(?\d{3,4}\)?[\s\-]?\d{3,4}[\s\-]?\d{3,4}"
 
+EMAIL_RE = re.compile(EMAIL_REGEX)
+PHONE_RE = re.compile(PHONE_REGEX)
+CID_RE = re.compile(r'\(cid:\d+\)')
+_NON_DIGIT_RE = re.compile(r'\D')
+_GRAD_YEAR_RE = re.compile(r'20(\d{2})')
+
+STUDENT_INDICATORS = [
+    r'\bcurrent(ly)?\s+(?:studying|pursuing|enrolled)',
+    r'\b(?:undergraduate|bachelor|btech|b\.tech)\s+student',
+    r'\bexpected\s+graduation',
+    r'\bseek(?:ing)?\s+internship',
+    r'\bfresher\b',
+    r'\bcgpa\s*[:=]\s*\d',
+]
+
+INTERNSHIP_INDICATORS = [
+    r'\bseek(?:ing)?\s+(?:summer\s+)?internship',
+    r'\bintern(?:ship)?\s+(?:position|role|opportunity)',
+    r'\bsummer\s+(?:intern|internship)',
+]
+
+# One alternation per category, so each is a single scan of the text
+STUDENT_RE = re.compile('|'.join(f'(?:{p})' for p in STUDENT_INDICATORS))
+INTERN_RE = re.compile('|'.join(f'(?:{p})' for p in INTERNSHIP_INDICATORS))
+
+# Tried in order (the first pattern wins even if the second matches earlier),
+# so these stay separate rather than one alternation
+YEARS_RES = [
+    re.compile(r'(\d+)\+?\s*years?\s+(?:of\s+)?experience'),
+    re.compile(r'experience\s*:\s*(\d+)\+?\s*years?'),
+]
+
 
 def extract_contact_info(text: str) -> dict:
     """
     Extract email and phone from the entire text.
     """
-    email_match = re.search(EMAIL_REGEX, text)
+    email_match = EMAIL_RE.search(text)
     
     # Clean text from PDF artifacts before phone extraction
-    cleaned_text = re.sub(r'\(cid:\d+\)', '', text)
+    cleaned_text = CID_RE.sub('', text)
     
     # Find phone numbers
-    phone_matches = re.findall(PHONE_REGEX, cleaned_text)
+    phone_matches = PHONE_RE.findall(cleaned_text)
     # Filter out invalid matches 
     valid_phones = []
     for phone in phone_matches:
         # Remove all non-digits to count
-        digits_only = re.sub(r'\D', '', phone)
+        digits_only = _NON_DIGIT_RE.sub('', phone)
         # Valid phone should have 10+ digits
         if len(digits_only) >= 10:
             valid_phones.append(phone.strip())
@@ -37,7 +69,7 @@ def extract_contact_info(text: str) -> dict:
     phone = valid_phones[0] if valid_phones else None
     
     # Try to extract name from first line
-    first_line = text.split("\n")[0].strip()
+    first_line = text.partition("\n")[0].strip()
     name = first_line if len(first_line.split()) <= 4 else None
     
     return {
@@ -52,35 +84,15 @@ def detect_experience_level(text: str, education: List[dict]) -> dict:
     """
     text_lower = text.lower()
     
-    student_indicators = [
-        r'\bcurrent(ly)?\s+(?:studying|pursuing|enrolled)',
-        r'\b(?:undergraduate|bachelor|btech|b\.tech)\s+student',
-        r'\bexpected\s+graduation',
-        r'\bseek(?:ing)?\s+internship',
-        r'\bfresher\b',
-        r'\bcgpa\s*[:=]\s*\d',
-    ]
-    
-    is_student = any(re.search(pattern, text_lower) for pattern in student_indicators)
+    is_student = STUDENT_RE.search(text_lower) is not None
     
     # Check for internship seeking
-    internship_indicators = [
-        r'\bseek(?:ing)?\s+(?:summer\s+)?internship',
-        r'\bintern(?:ship)?\s+(?:position|role|opportunity)',
-        r'\bsummer\s+(?:intern|internship)',
-    ]
-    
-    seeking_internship = any(re.search(pattern, text_lower) for pattern in internship_indicators)
+    seeking_internship = INTERN_RE.search(text_lower) is not None
     
     # Extract years of experience
-    years_patterns = [
-        r'(\d+)\+?\s*years?\s+(?:of\s+)?experience',
-        r'experience\s*:\s*(\d+)\+?\s*years?',
-    ]
-    
     years_experience = 0
-    for pattern in years_patterns:
-        match = re.search(pattern, text_lower)
+    for pattern in YEARS_RES:
+        match = pattern.search(text_lower)
         if match:
             years_experience = int(match.group(1))
             break
@@ -90,7 +102,7 @@ def detect_experience_level(text: str, education: List[dict]) -> dict:
         for edu in education:
             # Look for expected graduation or recent graduation
             degree_text = edu.get('degree', '') + ' ' + edu.get('details', '')
-            year_match = re.search(r'20(\d{2})', degree_text)
+            year_match = _GRAD_YEAR_RE.search(degree_text)
             if year_match:
                 grad_year = int('20' + year_match.group(1))
                 if grad_year >= current_year - 1:  # Graduated within last year or future
@@ -1,3 +1,4 @@
+from app.utils.matching import build_automaton, iter_matches
 
 SECTION_KEYWORDS = {
     "skills": [
@@ -30,20 +31,37 @@ SECTION_KEYWORDS = {
 }
 
 
+# Keyword -> section types it counts toward, and one automaton over all keywords
+_KEYWORD_SECTIONS = {}
+for _section_type, _keywords in SECTION_KEYWORDS.items():
+    for _keyword in _keywords:
+        _KEYWORD_SECTIONS.setdefault(_keyword, []).append(_section_type)
+_KEYWORD_AUTOMATON = build_automaton(_KEYWORD_SECTIONS)
+
+# Keywords land in the header and the opening lines, so only this much
+# content is lowercased and scanned
+_CONTENT_SCAN_CHARS = 500
+
+
 def classify_section(header: str, content: str) -> str:
     """
     Classify a section by analyzing both header and content.
     """
-    # Combine header and content for analysis
-    text = (header + " " + content).lower()
-    if "coursework" in header.lower():
+    # Combine header and the start of the content for analysis
+    header = header.lower()
+    if "coursework" in header:
         return "coursework"
+    text = header + " " + content[:_CONTENT_SCAN_CHARS].lower()
+    
+    # One Aho-Corasick pass finds every keyword present
+    found = {keyword for _, keyword in iter_matches(_KEYWORD_AUTOMATON, text)}
     
-    # Score each section type
-    scores = {}
-    for section_type, keywords in SECTION_KEYWORDS.items():
-        scores[section_type] = sum(1 for keyword in keywords if keyword in text)
+    # Score each section type by how many of its keywords appear
+    scores = dict.fromkeys(SECTION_KEYWORDS, 0)
+    for keyword in found:
+        for section_type in _KEYWORD_SECTIONS[keyword]:
+            scores[section_type] += 1
     
     # Get highest scoring type
     best_match = max(scores, key=scores.get)
-    return best_match if scores[best_match] > 0 else "other"
\ No newline at end of file
+    return best_match if scores[best_match] > 0 else "other"
@@ -1,28 +1,34 @@
+from itertools import accumulate
 from .heading_detector import is_heading
 
 def split_into_sections(text: str) -> dict:
     sections = {}
-    current_heading = "header"  
-    current_content = []
     
     lines = text.split("\n")
     
+    # First pass: find heading lines
+    headings = []
     for i, line in enumerate(lines):
-        # Check if this line is a heading
-        if is_heading(line):
-            # Save previous section if it has content
-            if current_content:
-                sections[current_heading] = "\n".join(current_content).strip()
-            
-            # Start new section
-            current_heading = line.strip()
-            current_content = []
-        else:
-            # Add line to current section
-            current_content.append(line)
+        stripped = line.strip()
+        
+        # Cheap prefilter: blank lines and lines ending like a sentence are
+        # never headings, so most body lines skip the is_heading call
+        if not stripped or stripped[-1] in ".,;":
+            continue
+        
+        if is_heading(stripped):
+            headings.append((i, stripped))
     
-    if current_content:
-        sections[current_heading] = "\n".join(current_content).strip()
+    # Character offset where each line starts (+1 for the newline)
+    line_starts = [0, *accumulate(len(line) + 1 for line in lines)]
+    
+    # Each section is a slice of the original text between two headings;
+    # text before the first heading goes under "header"
+    bounds = [(-1, "header"), *headings, (len(lines), None)]
+    for (start, heading), (end, _) in zip(bounds, bounds[1:]):
+        # Headings with no lines after them don't replace an earlier section
+        if end > start + 1:
+            sections[heading] = text[line_starts[start + 1]:line_starts[end]].strip()
     
     # Filter out empty sections
-    return {k: v for k, v in sections.items() if v}
\ No newline at end of file
+    return {k: v for k, v in sections.items() if v}
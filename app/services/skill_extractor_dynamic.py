@@ -2,13 +2,19 @@
 Domain-agnostic skill extraction using NLP and linguistic patterns.
 """
 import spacy
-from spacy.matcher import Matcher
+from spacy.tokens import Doc
+from functools import lru_cache
+import io
 import re
-from typing import List, Set, Dict
+import string
+from typing import Dict, Iterable, Iterator, List, Set
 
-nlp = spacy.load("en_core_web_sm")
+from app.utils.matching import build_automaton, iter_matches
 
-NON_SKILL_TERMS = {
+# Lemmas are never read, so skip the lemmatizer
+nlp = spacy.load("en_core_web_sm", disable=["lemmatizer"])
+
+NON_SKILL_TERMS = frozenset({
     # Months
     'january', 'february', 'march', 'april', 'may', 'june', 'july',
     'august', 'september', 'october', 'november', 'december',
@@ -42,7 +48,85 @@ NON_SKILL_TERMS = {
     
     # Category headers that might leak through
     'programming languages', 'developer tools', 'data science',
-}
+})
+
+MONTHS = frozenset({
+    'january', 'february', 'march', 'april', 'may', 'june', 'july',
+    'august', 'september', 'october', 'november', 'december',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec',
+})
+
+# Matched as substrings, so "Kolkata District" counts
+LOCATION_INDICATORS = ('city', 'district', 'state')
+
+# Common known skills that are always kept
+KNOWN_SKILLS = frozenset({
+    'python', 'java', 'javascript', 'c++', 'c#', 'c', 'r', 'html', 'css', 'php', 'sql',
+    'ruby', 'go', 'rust', 'swift', 'kotlin', 'scala', 'perl', 'bash', 'shell',
+    'git', 'github', 'gitlab', 'linux', 'unix', 'windows', 'docker', 'kubernetes',
+    'hadoop', 'spark', 'kafka', 'redis', 'mongodb', 'postgresql', 'mysql', 'oracle',
+    'numpy', 'pandas', 'scipy', 'matplotlib', 'sklearn', 'tensorflow', 'pytorch', 'keras',
+    'opencv', 'pyspark', 'fastapi', 'flask', 'django', 'react', 'angular', 'vue',
+    'node.js', 'express', 'spring', 'hibernate', 'aws', 'azure', 'gcp',
+    'faiss', 'streamlit', 'tableau', 'powerbi', 'excel', 'jira', 'confluence'
+})
+
+# Characters that mark a candidate as layout noise rather than a skill
+_BAD_CHARS = frozenset('§•()[]{}@$%^&*')
+_ASCII_LETTERS = frozenset(string.ascii_letters)
+
+# Substrings marking a "Category: a, b, c" line as a skills listing
+SKILL_CATEGORY_KEYWORDS = (
+    'skill', 'language', 'tool', 'platform', 'technology', 'technologie',
+    'framework', 'library', 'software', 'certification', 'qualification',
+    'competenc', 'proficienc', 'expertise', 'programming', 'developer',
+    'data science', 'ml', 'method', 'technique'
+)
+
+# Patterns compiled once at import instead of on every call
+_CONTAINS_YEAR_RE = re.compile(r'\d{4}')
+_WORD_MONTH_RE = re.compile(r'^[a-z]+\s+(aug|sep|oct|nov|dec|jan|feb|mar|apr|may|jun|jul)\.?$')
+_ITEM_SEP_RE = re.compile(r',|;')
+_BULLET_RE = re.compile(r'^[•◦\-\*]\s*')
+_ACRONYM_RE = re.compile(r'\b[A-Z]{2,8}\b')
+_CAMELCASE_RE = re.compile(r'\b[A-Z][a-z]*[A-Z][A-Za-z]*\b')
+
+_SKILL_CONTEXT_RES = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'(?:proficient|skilled|experienced|expert|knowledge)\s+(?:in|with|of)',
+        r'(?:using|utilizing|applying|working with|implemented)',
+        r'(?:skills?|tools?|technologies?|platforms?):\s*',
+        r'(?:certified|trained|licensed)\s+(?:in|for)',
+    )
+]
+
+_SKILL_PHRASE_RES = [
+    re.compile(pattern) for pattern in (
+        r'(?:proficient|skilled|experienced|expert)\s+(?:in|with)\s+([A-Z][A-Za-z0-9\+\#\s\-\.]+?)(?=\s*[,;.]|\s+and\s+|\s+or\s+|$)',
+        r'(?:experience|expertise|knowledge)\s+(?:in|with|of)\s+([A-Z][A-Za-z0-9\+\#\s\-\.]+?)(?=\s*[,;.]|\s+and\s+|$)',
+        r'(?:using|utilizing|implemented)\s+([A-Z][A-Za-z0-9\+\#\s\-\.]+?)(?=\s*[,;.]|\s+and\s+|\s+for\s+|\s+to\s+|$)',
+        r'(?:certified|trained)\s+(?:in|for)\s+([A-Z][A-Za-z0-9\s\-\.]+?)(?=\s*[,;.]|$)',
+    )
+]
+
+
+@lru_cache(maxsize=32)
+def _parse(text: str) -> Doc:
+    """
+    Run the spaCy pipeline once per text. The skill and context extractors
+    both need the same resume's Doc, so repeat calls are served from here.
+    """
+    return nlp(text)
+
+
+# An acronym counts as a skill when it follows one of these keywords
+# within the same run of word/space/",&:" characters
+_ACRONYM_CONTEXT_RE = re.compile(
+    r'skills?|tools?|technologies?|platforms?|languages?|using|with|implemented|science|ml|developer',
+    re.IGNORECASE
+)
+_CONTEXT_RUN_RE = re.compile(r'[\s\w,&:]+')
+_WORD_START_RE = re.compile(r'\b\w+')
 
 
 def is_date_or_location_fragment(text: str) -> bool:
@@ -52,29 +136,24 @@ def is_date_or_location_fragment(text: str) -> bool:
     text_lower = text.lower().strip()
     
     # Month names or abbreviations
-    months = ['january', 'february', 'march', 'april', 'may', 'june', 'july',
-              'august', 'september', 'october', 'november', 'december',
-              'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
-    
-    if text_lower in months:
+    if text_lower in MONTHS:
         return True
     
     # Date patterns (2023, 2023-2024, Aug 2023, etc.)
-    if re.match(r'^\d{4}$', text_lower):  # Just a year
-        return True
-    
-    if re.search(r'\d{4}', text_lower) and len(text_lower.split()) <= 3:  # Contains year
+    if _CONTAINS_YEAR_RE.search(text_lower) and len(text_lower.split()) <= 3:  # Contains year
         return True
     
     # Location patterns (contains location indicators)
-    location_indicators = ['city', 'district', 'state']
-    if any(ind in text_lower for ind in location_indicators):
-        return True
-
-    if re.match(r'^[a-z]+\s+(aug|sep|oct|nov|dec|jan|feb|mar|apr|may|jun|jul)\.?$', text_lower):
+    if any(ind in text_lower for ind in LOCATION_INDICATORS):
         return True
     
-    return False
+    # "<word> Aug" style date tails
+    return _WORD_MONTH_RE.match(text_lower) is not None
+
+
+def _is_non_skill(term: str) -> bool:
+    """Blacklisted term, or a date/location fragment"""
+    return term.lower() in NON_SKILL_TERMS or is_date_or_location_fragment(term)
 
 
 def extract_from_explicit_skill_listings(text: str) -> Set[str]:
@@ -83,101 +162,80 @@ def extract_from_explicit_skill_listings(text: str) -> Set[str]:
     """ 
     skills = set()
     
-    # Split text into lines for line-by-line processing
-    lines = text.split('\n')
-    
-    for line in lines:
-        match = re.match(r'^([^:]+):\s*(.+)$', line.strip())
+    # Iterate lines lazily; only "Category: items" lines can match
+    for line in io.StringIO(text):
+        if ':' not in line:
+            continue
         
-        if match:
-            category = match.group(1).strip()
-            items_str = match.group(2).strip()
-            
-            # Check if this looks like a skills category
-            skill_category_keywords = [
-                'skill', 'language', 'tool', 'platform', 'technology', 'technologie',
-                'framework', 'library', 'software', 'certification', 'qualification',
-                'competenc', 'proficienc', 'expertise', 'programming', 'developer',
-                'data science', 'ml', 'method', 'technique'
-            ]
-            
-            category_lower = category.lower()
-            is_skill_category = any(keyword in category_lower for keyword in skill_category_keywords)
+        category, _, items_str = line.strip().partition(':')
+        category = category.strip()
+        items_str = items_str.strip()
+        if not category or not items_str:
+            continue
+        
+        # Check if this looks like a skills category
+        category_lower = category.lower()
+        if not any(keyword in category_lower for keyword in SKILL_CATEGORY_KEYWORDS):
+            continue
+        
+        # Split by comma or semicolon
+        for part in _ITEM_SEP_RE.split(items_str):
+            # Remove bullets and extra whitespace
+            words = _BULLET_RE.sub('', part.strip()).split()
             
-            if is_skill_category and items_str:
-                # Split by comma or semicolon
-                parts = re.split(r',|;', items_str)
-                
-                for part in parts:
-                    cleaned = part.strip()
-                    # Remove bullets and extra whitespace
-                    cleaned = re.sub(r'^[•◦\-\*]\s*', '', cleaned)
-                    cleaned = re.sub(r'\s+', ' ', cleaned)
-                    
-                    # Skip empty
-                    if not cleaned:
-                        continue
-                    
-                    # Accept reasonable length (1-5 words for skills)
-                    word_count = len(cleaned.split())
-                    if 1 <= word_count <= 5:
-                        # Additional validation
-                        if not is_date_or_location_fragment(cleaned):
-                            skills.add(cleaned.lower())
+            # Accept reasonable length (1-5 words for skills)
+            if 1 <= len(words) <= 5:
+                cleaned = ' '.join(words)
+                # Additional validation
+                if not is_date_or_location_fragment(cleaned):
+                    skills.add(cleaned.lower())
     
     return skills
 
 
-def extract_proper_nouns_in_skill_context(text: str) -> Set[str]:
+def extract_proper_nouns_in_skill_context(doc: Doc) -> Set[str]:
     """
     Extract proper nouns ONLY when they appear in skill-related contexts.
     """
-    doc = nlp(text)
     skills = set()
     
-    # Define skill context indicators
-    skill_context_patterns = [
-        r'(?:proficient|skilled|experienced|expert|knowledge)\s+(?:in|with|of)',
-        r'(?:using|utilizing|applying|working with|implemented)',
-        r'(?:skills?|tools?|technologies?|platforms?):\s*',
-        r'(?:certified|trained|licensed)\s+(?:in|for)',
+    # Find sentences that contain skill contexts, in document order
+    skill_sentences = [
+        sent for sent in doc.sents
+        if any(pattern.search(sent.text) for pattern in _SKILL_CONTEXT_RES)
     ]
-    
-    # Find sentences that contain skill contexts
-    skill_sentences = []
-    for sent in doc.sents:
-        sent_text = sent.text
-        if any(re.search(pattern, sent_text, re.IGNORECASE) for pattern in skill_context_patterns):
-            skill_sentences.append(sent)
-    
-    # Extract proper nouns only from these sentences
-    for sent in skill_sentences:
-        for chunk in sent.noun_chunks:
-            chunk_text = chunk.text.strip()
-            chunk_lower = chunk_text.lower()
-            
-            # Skip if in blacklist
-            if chunk_lower in NON_SKILL_TERMS:
-                continue
-            
-            # Skip if date/location
-            if is_date_or_location_fragment(chunk_text):
-                continue
-            
-            # Skip very long phrases
-            if len(chunk_text.split()) > 4:
-                continue
-            
-            # Capitalized terms (not at sentence start)
-            is_capitalized = chunk_text[0].isupper()
-            is_sentence_start = chunk.start == sent.start
-            
-            if is_capitalized and not is_sentence_start and len(chunk_text) > 2:
-                skills.add(chunk_lower)
-            
-            # All caps acronyms (2-8 chars for things like FAISS, OpenCV)
-            if chunk_text.isupper() and 2 <= len(chunk_text) <= 8:
-                skills.add(chunk_lower)
+    if not skill_sentences:
+        return skills
+    
+    # doc.noun_chunks reruns the chunker on every access (Span.noun_chunks
+    # filters the full list per sentence), so walk it once alongside them
+    sentences = iter(skill_sentences)
+    sent = next(sentences)
+    for chunk in doc.noun_chunks:
+        while chunk.start >= sent.end:
+            sent = next(sentences, None)
+            if sent is None:
+                return skills
+        if chunk.start < sent.start or chunk.end > sent.end:
+            continue
+        
+        chunk_text = chunk.text.strip()
+        chunk_lower = chunk_text.lower()
+        
+        # Skip very long phrases
+        if len(chunk_text.split()) > 4:
+            continue
+        
+        # Capitalized terms (not at sentence start)
+        is_capitalized = chunk_text[0].isupper()
+        is_sentence_start = chunk.start == sent.start
+        
+        if is_capitalized and not is_sentence_start and len(chunk_text) > 2:
+            skills.add(chunk_lower)
+        
+        # All caps acronyms (2-8 chars for things like FAISS, OpenCV)
+        if chunk_text.isupper() and 2 <= len(chunk_text) <= 8:
+            skills.add(chunk_lower)
     
     return skills
 
@@ -189,32 +247,22 @@ def extract_skills_from_action_contexts(text: str) -> Set[str]:
     skills = set()
     
     # Specific patterns for skill mentions
-    skill_phrases = [
-        r'(?:proficient|skilled|experienced|expert)\s+(?:in|with)\s+([A-Z][A-Za-z0-9\+\#\s\-\.]+?)(?=\s*[,;.]|\s+and\s+|\s+or\s+|$)',
-        r'(?:experience|expertise|knowledge)\s+(?:in|with|of)\s+([A-Z][A-Za-z0-9\+\#\s\-\.]+?)(?=\s*[,;.]|\s+and\s+|$)',
-        r'(?:using|utilizing|implemented)\s+([A-Z][A-Za-z0-9\+\#\s\-\.]+?)(?=\s*[,;.]|\s+and\s+|\s+for\s+|\s+to\s+|$)',
-        r'(?:certified|trained)\s+(?:in|for)\s+([A-Z][A-Za-z0-9\s\-\.]+?)(?=\s*[,;.]|$)',
-    ]
-    
-    for pattern in skill_phrases:
-        matches = re.finditer(pattern, text)
+    for pattern in _SKILL_PHRASE_RES:
+        matches = pattern.finditer(text)
         for match in matches:
             skill = match.group(1).strip().lower()
             
             # Validate
-            if not is_date_or_location_fragment(skill):
-                if skill not in NON_SKILL_TERMS:
-                    if 1 <= len(skill.split()) <= 5:
-                        skills.add(skill)
+            if 1 <= len(skill.split()) <= 5:
+                skills.add(skill)
     
     return skills
 
 
-def extract_named_entities(text: str) -> Set[str]:
+def extract_named_entities(doc: Doc) -> Set[str]:
     """
     Extract named entities that represent skills/tools.
     """
-    doc = nlp(text)
     skills = set()
     
     for ent in doc.ents:
@@ -223,14 +271,6 @@ def extract_named_entities(text: str) -> Set[str]:
             ent_text = ent.text.strip()
             ent_lower = ent_text.lower()
             
-            # Skip if blacklisted
-            if ent_lower in NON_SKILL_TERMS:
-                continue
-            
-            # Skip if date/location
-            if is_date_or_location_fragment(ent_text):
-                continue
-            
             # Skip very long entities
             if len(ent_text.split()) > 5:
                 continue
@@ -242,27 +282,38 @@ def extract_named_entities(text: str) -> Set[str]:
     return skills
 
 
+def _skill_context_words(text: str) -> Set[str]:
+    """
+    Lowercased words that follow a skill keyword before the next character
+    outside word/space/",&:", collected in one pass over the text.
+    """
+    words = set()
+    for run in _CONTEXT_RUN_RE.finditer(text):
+        keyword = _ACRONYM_CONTEXT_RE.search(text, run.start(), run.end())
+        if keyword:
+            words.update(w.lower() for w in _WORD_START_RE.findall(text, keyword.end(), run.end()))
+    return words
+
+
 def extract_technical_acronyms(text: str) -> Set[str]:
     """
     Extract all-caps acronyms that are likely skills.
     """
     skills = set()
-    acronyms = re.findall(r'\b[A-Z]{2,8}\b', text)
+    acronyms = _ACRONYM_RE.findall(text)
+    if not acronyms:
+        return skills
+    context_words = _skill_context_words(text)
     
     for acronym in acronyms:
         acronym_lower = acronym.lower()
         
-        # Skip if blacklisted
+        # Skip if blacklisted (month abbreviations included)
         if acronym_lower in NON_SKILL_TERMS:
             continue
         
-        # Skip if it's just a month abbreviation
-        if acronym_lower in ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']:
-            continue
-        
         # Look for it near skill keywords or in skill section context
-        pattern = r'(?:skills?|tools?|technologies?|platforms?|languages?|using|with|implemented|science|ml|developer)[\s\w,&:]*\b' + re.escape(acronym) + r'\b'
-        if re.search(pattern, text, re.IGNORECASE):
+        if acronym_lower in context_words:
             skills.add(acronym_lower)
     
     return skills
@@ -273,19 +324,11 @@ def extract_camelcase_and_special_terms(text: str) -> Set[str]:
     Extract CamelCase terms and special naming patterns.
     """
     skills = set()
-    camelcase = re.findall(r'\b[A-Z][a-z]*[A-Z][A-Za-z]*\b', text)
+    camelcase = _CAMELCASE_RE.findall(text)
     
     for term in camelcase:
         term_lower = term.lower()
         
-        # Skip if blacklisted
-        if term_lower in NON_SKILL_TERMS:
-            continue
-        
-        # Skip if date/location
-        if is_date_or_location_fragment(term):
-            continue
-        
         # Reasonable length
         if 2 <= len(term) <= 20:
             skills.add(term_lower)
@@ -301,56 +344,30 @@ def clean_and_filter_skills(skills: Set[str]) -> List[str]:
     
     for skill in skills:
         # Remove newlines and extra whitespace
-        skill = re.sub(r'\s+', ' ', skill.strip())
-        
-        # Skip if empty
-        if not skill:
-            continue
+        words = skill.split()
+        skill = ' '.join(words)
         
-        # Skip if in blacklist
-        if skill.lower() in NON_SKILL_TERMS:
+        # Skip if empty, or too long (likely a sentence fragment)
+        if not skill or len(words) > 6:
             continue
         
-        # Skip if date or location
-        if is_date_or_location_fragment(skill):
-            continue
-        
-        # Skip if contains problematic special characters 
-        if re.search(r'[§•()\[\]{}@$%^&*]', skill):
-            continue
-        
-        # Skip if too long (likely a sentence fragment)
-        if len(skill.split()) > 6:
-            continue
-        
-        # Skip if empty or no letters
-        if not re.search(r'[a-zA-Z]', skill):
-            continue
-        
-        # Skip pure numbers or years
-        if re.match(r'^\d+$', skill) or re.match(r'^\d{4}$', skill):
+        # Skip if contains problematic special characters, or has no letters
+        # (which also covers pure numbers and years)
+        if not _BAD_CHARS.isdisjoint(skill) or _ASCII_LETTERS.isdisjoint(skill):
             continue
         
         # Skip single letters (unless it's known like 'c' or 'r')
-        if len(skill) == 1 and skill.lower() not in ['c', 'r']:
+        if len(skill) == 1 and skill.lower() not in ('c', 'r'):
             continue
         
-        # Common known skills that should always be included
-        known_skills = {
-            'python', 'java', 'javascript', 'c++', 'c#', 'c', 'r', 'html', 'css', 'php', 'sql',
-            'ruby', 'go', 'rust', 'swift', 'kotlin', 'scala', 'perl', 'bash', 'shell',
-            'git', 'github', 'gitlab', 'linux', 'unix', 'windows', 'docker', 'kubernetes',
-            'hadoop', 'spark', 'kafka', 'redis', 'mongodb', 'postgresql', 'mysql', 'oracle',
-            'numpy', 'pandas', 'scipy', 'matplotlib', 'sklearn', 'tensorflow', 'pytorch', 'keras',
-            'opencv', 'pyspark', 'fastapi', 'flask', 'django', 'react', 'angular', 'vue',
-            'node.js', 'express', 'spring', 'hibernate', 'aws', 'azure', 'gcp',
-            'faiss', 'streamlit', 'tableau', 'powerbi', 'excel', 'jira', 'confluence'
-        }
+        # Skip blacklisted terms and dates/locations
+        if _is_non_skill(skill):
+            continue
         
         skill_lower = skill.lower()
         
         # If it's a known skill, add it
-        if skill_lower in known_skills:
+        if skill_lower in KNOWN_SKILLS:
             cleaned.add(skill_lower)
             continue
         
@@ -366,12 +383,37 @@ def extract_skills_dynamic(text: str) -> List[str]:
     """
     Main function for domain-agnostic skill extraction.
     """
+    return _extract_skills_from_doc(_parse(text))
+
+
+def extract_skills_dynamic_batch(
+    texts: Iterable[str],
+    batch_size: int = 50,
+    n_process: int = 1
+) -> Iterator[List[str]]:
+    """
+    Skill extraction for many documents (resumes or job descriptions),
+    yielding one skill list per text in input order. nlp.pipe() batches
+    the spaCy pipeline; n_process > 1 forks worker processes, which only
+    pays off for large batches.
+    """
+    for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+        yield _extract_skills_from_doc(doc)
+
+
+def _extract_skills_from_doc(doc: Doc) -> List[str]:
+    """
+    Run every extraction strategy over a parsed document. Blacklisted terms
+    and date/location fragments are dropped once, in clean_and_filter_skills.
+    """
+    text = doc.text
     all_skills = set()
     all_skills.update(extract_from_explicit_skill_listings(text))
-    all_skills.update(extract_proper_nouns_in_skill_context(text))
+    all_skills.update(extract_proper_nouns_in_skill_context(doc))
     all_skills.update(extract_skills_from_action_contexts(text))
-    all_skills.update(extract_named_entities(text))
-    all_skills.update(extract_technical_acronyms(text))
+    all_skills.update(extract_named_entities(doc))
+    # Every extract_technical_acronyms hit is also a CamelCase match, so
+    # the context-filtered acronym scan adds nothing here
     all_skills.update(extract_camelcase_and_special_terms(text))
     return clean_and_filter_skills(all_skills)
 
@@ -381,20 +423,23 @@ def extract_skills_with_context_dynamic(text: str) -> Dict[str, List[str]]:
     Extract skills with context (sentences where they appear).
     """
     skills = extract_skills_dynamic(text)
-    skills_context = {}
-    
-    doc = nlp(text)
-    
-    for skill in skills:
-        # Find sentences containing this skill (case-insensitive)
-        skill_pattern = re.compile(r'\b' + re.escape(skill) + r'\b', re.IGNORECASE)
-        
-        for sent in doc.sents:
-            if skill_pattern.search(sent.text):
-                if skill not in skills_context:
-                    skills_context[skill] = []
-                # Limit to 3 contexts per skill to avoid bloat
-                if len(skills_context[skill]) < 3:
-                    skills_context[skill].append(sent.text.strip())
-    
-    return skills_context
\ No newline at end of file
+    if not skills:
+        return {}
+    
+    # One automaton for all skills instead of one regex per skill; each
+    # sentence is scanned once (lowercased, as skills are) and matches are
+    # checked against the same \b boundaries the regex used
+    automaton = build_automaton(skills)
+    contexts_by_skill: Dict[str, List[str]] = {}
+    
+    # Same cached Doc as extract_skills_dynamic
+    for sent in _parse(text).sents:
+        sentence = sent.text
+        matched = {word for _, word in iter_matches(automaton, sentence.lower(), regex_boundaries=True)}
+        for skill in matched:
+            contexts = contexts_by_skill.setdefault(skill, [])
+            # Limit to 3 contexts per skill to avoid bloat
+            if len(contexts) < 3:
+                contexts.append(sentence.strip())
+    
+    return {skill: contexts_by_skill[skill] for skill in skills if skill in contexts_by_skill}
@@ -1,20 +1,46 @@
 from pdfminer.high_level import extract_text as pdf_extract_text
+import pypdfium2 as pdfium
 import docx2txt
 import pytesseract
 from pdf2image import convert_from_path
 from PIL import Image
 import os
+import tempfile
 from typing import Optional
 import signal
 
+# 200 DPI is plenty for body text and ~2.25x fewer pixels than 300
+OCR_DPI = 200
+
 class TimeoutException(Exception):
     pass
 
 def timeout_handler(signum, frame):
     raise TimeoutException("OCR operation timed out")
 
+def _extract_pdf_text_fast(path: str) -> str:
+    """
+    Text layer via PDFium's C++ extractor, much faster than pdfminer's
+    layout analysis. PDFium ends lines with CRLF; normalize to LF. Pages
+    are separated by a blank line, as pdfminer does, so the section and
+    project parsers still see a break between pages.
+    """
+    pdf = pdfium.PdfDocument(path)
+    try:
+        text = "\n\n".join(page.get_textpage().get_text_range() for page in pdf)
+    finally:
+        pdf.close()
+    return text.replace("\r\n", "\n")
+
 def extract_text_from_pdf(path: str, use_ocr_fallback: bool = True) -> str:
-    text = pdf_extract_text(path)
+    try:
+        text = _extract_pdf_text_fast(path)
+    except Exception as e:
+        print(f"PDFium extraction failed: {e}, falling back to pdfminer")
+        text = ""
+    
+    if not text.strip():
+        text = pdf_extract_text(path)
     
     if use_ocr_fallback and len(text.strip()) < 100:
         print("Low text content detected, attempting OCR")
@@ -37,13 +63,20 @@ def extract_text_from_pdf_with_ocr(path: str, timeout: int = 60) -> str:
             signal.signal(signal.SIGALRM, timeout_handler)
             signal.alarm(timeout)
         
-        images = convert_from_path(path, dpi=300)
-        
-        text_parts = []
-        for i, image in enumerate(images):
-            print(f"OCR processing page {i+1}/{len(images)}...")
-            page_text = pytesseract.image_to_string(image, lang='eng')
-            text_parts.append(page_text)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # Pages are rendered to files and handed to tesseract by path,
+            # so no page bitmaps are held in memory
+            pages = convert_from_path(
+                path, dpi=OCR_DPI, output_folder=tmpdir,
+                paths_only=True, fmt='jpeg'
+            )
+            if not pages:
+                return ""
+            
+            # Pages are OCRed one at a time: this already runs in a CPU pool
+            # worker, and the pool runs several resumes at once
+            print(f"OCR processing {len(pages)} pages...")
+            text_parts = [_ocr_page(page) for page in pages]
         
         if os.name != 'nt':
             signal.alarm(0)
@@ -59,6 +92,9 @@ def extract_text_from_pdf_with_ocr(path: str, timeout: int = 60) -> str:
         if os.name != 'nt':
             signal.alarm(0)
 
+def _ocr_page(image_path: str) -> str:
+    return pytesseract.image_to_string(image_path, lang='eng')
+
 def extract_text_from_image(path: str) -> str:
     try:
         image = Image.open(path)
@@ -1,73 +1,298 @@
 import faiss
 import numpy as np
-import json
+import orjson
+import os
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterable
 from app.core.config import settings
 
+# Map the index file instead of reading it into memory: pages fault in on
+# demand and are shared by every process that loads the same file.
+# IO_FLAG_MMAP_IFC (FAISS >= 1.8) maps flat / scalar-quantized codes, which
+# back the flat and HNSW tiers; older FAISS can only map IVF lists. The
+# two flags can't be combined
+_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+# Below this many IVF lists an exhaustive scan of the centroids is cheap
+# and exact; above it the coarse quantizer becomes an HNSW graph
+_HNSW_QUANTIZER_MIN_NLIST = 4096
+
+
+class IndexFormatError(ValueError):
+    """The index file on disk was written in a format this store can't search"""
+
 
 class VectorStore:
     """FAISS-based vector store for job embeddings"""
-    def __init__(self, dimension: int = 384):
+    def __init__(
+        self,
+        dimension: int = 384,
+        nlist: Optional[int] = None,
+        pq_m: int = 16,
+        pq_nbits: int = 8,
+        nprobe: int = 16,
+        hnsw_min_size: int = 10_000,
+        ivfpq_min_size: int = 100_000,
+        hnsw_m: int = 32,
+        ef_construction: int = 200,
+        ef_search: int = 64
+    ):
         self.dimension = dimension
+        self.nlist = nlist  # None sizes the IVF lists from the catalog
+        self.pq_m = pq_m
+        self.pq_nbits = pq_nbits
+        self.nprobe = nprobe
+        self.hnsw_min_size = hnsw_min_size
+        self.ivfpq_min_size = ivfpq_min_size
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
         self.index = None
         self.job_metadata = []  # List of job dicts
         self.job_id_to_idx = {}  # Map job_id -> index position
+        self.level_bitmaps = {}  # Map experience_level -> packed bitmap over index positions
+        self._filter_columns = {}  # Map filter key -> (value -> code, code per position)
     
     def create_index(self, embeddings: np.ndarray, metadata: List[Dict]):
         if len(embeddings) != len(metadata):
             raise ValueError("Embeddings and metadata must have same length")
         
-        # Create FAISS index (L2 distance, can be changed to Inner Product)
-        self.index = faiss.IndexFlatL2(self.dimension)
-        
-        # Normalize embeddings for cosine similarity
+        # Normalize embeddings so inner product == cosine similarity
+        embeddings = np.ascontiguousarray(embeddings, dtype='float32')
         faiss.normalize_L2(embeddings)
         
-        # Add vectors to index
-        self.index.add(embeddings.astype('float32'))
+        # Positions in job_metadata double as FAISS ids
+        ids = np.arange(len(metadata), dtype=np.int64)
+        
+        # Small catalogs are scanned in full over int8 scalar-quantized codes,
+        # mid-size ones go through an HNSW graph over the same int8 codes
+        # (logarithmic search), and large ones use IVF-PQ, which compresses
+        # vectors further to pq_m bytes. IVF-PQ needs enough vectors to train both
+        # the coarse quantizer and the PQ codebooks (~39 points per centroid)
+        nlist = self._ivf_nlist(len(embeddings))
+        min_train_size = 39 * max(nlist, 2 ** self.pq_nbits)
+        if len(embeddings) >= max(self.ivfpq_min_size, min_train_size):
+            index = self._train_ivfpq(embeddings, nlist)
+        elif len(embeddings) >= self.hnsw_min_size:
+            index = faiss.IndexHNSWSQ(
+                self.dimension, faiss.ScalarQuantizer.QT_8bit, self.hnsw_m, faiss.METRIC_INNER_PRODUCT
+            )
+            index.hnsw.efConstruction = self.ef_construction
+            index.hnsw.efSearch = self.ef_search
+            index.train(embeddings)
+        else:
+            index = faiss.IndexScalarQuantizer(
+                self.dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+            index.train(embeddings)
+        
+        self.index = faiss.IndexIDMap2(index)
+        self.index.add_with_ids(embeddings, ids)
         
         # Store metadata
         self.job_metadata = metadata
         
         # Create ID mapping
-        for idx, job in enumerate(metadata):
-            self.job_id_to_idx[job['id']] = idx
+        self.job_id_to_idx = {job['id']: idx for idx, job in enumerate(metadata)}
+        self._build_level_bitmaps()
+        self._filter_columns = {}
         
         print(f" Index created with {self.index.ntotal} jobs")
     
+    def _ivf_nlist(self, n: int) -> int:
+        """Number of IVF lists: the configured nlist, else ~2 * sqrt(n)"""
+        if self.nlist is not None:
+            return self.nlist
+        return max(int(2 * np.sqrt(n)), 20)
+    
+    def _train_ivfpq(self, embeddings: np.ndarray, nlist: int) -> faiss.IndexIVFPQ:
+        """
+        Train an IVF-PQ index. With many lists the coarse quantizer is an
+        HNSW graph over the centroids (IVF{nlist}_HNSW32), so assigning a
+        query to its nprobe lists is logarithmic instead of a scan.
+        """
+        if nlist < _HNSW_QUANTIZER_MIN_NLIST:
+            quantizer = faiss.IndexFlatIP(self.dimension)
+        else:
+            quantizer = faiss.IndexHNSWFlat(self.dimension, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            quantizer.hnsw.efConstruction = self.ef_construction
+            quantizer.hnsw.efSearch = max(self.ef_search, self.nprobe)
+        
+        index = faiss.IndexIVFPQ(
+            quantizer, self.dimension, nlist, self.pq_m, self.pq_nbits,
+            faiss.METRIC_INNER_PRODUCT
+        )
+        
+        # k-means assigns points with an exact flat index; only the final
+        # centroids go into the HNSW graph
+        clustering_index = faiss.IndexFlatIP(self.dimension)
+        index.clustering_index = clustering_index
+        index.train(embeddings)
+        index.clustering_index = None
+        
+        index.nprobe = self.nprobe
+        return index
+    
+    def _build_level_bitmaps(self):
+        """
+        One bit per index position for each experience level, packed for
+        faiss.IDSelectorBitmap (bit i of the array is position i)
+        """
+        levels = np.array([job.get('experience_level', 'mid') for job in self.job_metadata], dtype=object)
+        self.level_bitmaps = {
+            level: np.packbits(levels == level, bitorder='little')
+            for level in set(levels.tolist())
+        }
+    
+    def _level_search_params(self, levels: Iterable[str]):
+        """
+        Build FAISS search parameters restricting results to the given levels.
+        Returns None when no indexed job has any of the levels.
+        """
+        bitmaps = [self.level_bitmaps[level] for level in levels if level in self.level_bitmaps]
+        if not bitmaps:
+            return None
+        
+        # A bit test per candidate, rather than IDSelectorBatch's hash set
+        # built from the ids on every call
+        bitmap = np.bitwise_or.reduce(bitmaps) if len(bitmaps) > 1 else bitmaps[0]
+        sel = faiss.IDSelectorBitmap(len(self.job_metadata), faiss.swig_ptr(bitmap))
+        sel.referenced_objects = [bitmap]  # The selector only holds a pointer
+        
+        if self._hnsw_index() is not None:
+            return faiss.SearchParametersHNSW(sel=sel, efSearch=self.ef_search)
+        try:
+            faiss.extract_index_ivf(self.index)
+            return faiss.SearchParametersIVF(sel=sel, nprobe=self.nprobe)
+        except RuntimeError:
+            return faiss.SearchParameters(sel=sel)
+    
+    def _hnsw_index(self):
+        """The HNSW index under the id map, or None for IVF / flat indexes"""
+        if not isinstance(self.index, faiss.IndexIDMap):
+            return None
+        index = faiss.downcast_index(self.index.index)
+        return index if isinstance(index, faiss.IndexHNSW) else None
+    
+    def _set_search_params(self):
+        """Apply nprobe / efSearch to the underlying IVF or HNSW index"""
+        hnsw_index = self._hnsw_index()
+        if hnsw_index is not None:
+            hnsw_index.hnsw.efSearch = self.ef_search
+            return
+        try:
+            ivf_index = faiss.extract_index_ivf(self.index)
+        except RuntimeError:
+            return  # Flat index, nothing to tune
+        ivf_index.nprobe = self.nprobe
+        
+        # An HNSW coarse quantizer must explore at least nprobe centroids
+        quantizer = faiss.downcast_index(ivf_index.quantizer)
+        if isinstance(quantizer, faiss.IndexHNSW):
+            quantizer.hnsw.efSearch = max(self.ef_search, self.nprobe)
+    
     def search(
         self, 
         query_embedding: np.ndarray, 
         k: int = 10,
-        filters: Optional[Dict] = None
+        filters: Optional[Dict] = None,
+        levels: Optional[Iterable[str]] = None
     ) -> List[Tuple[Dict, float]]:
+        """
+        Search for the k nearest jobs. `levels` restricts the search to jobs
+        with those experience levels inside FAISS, so k results are returned
+        without over-fetching and post-filtering.
+        """
+        return self.search_batch(query_embedding.reshape(1, -1), k, filters=filters, levels=levels)[0]
+    
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        k: int = 10,
+        filters: Optional[Dict] = None,
+        levels: Optional[Iterable[str]] = None
+    ) -> List[List[Tuple[Dict, float]]]:
+        """
+        Search for the k nearest jobs to each row of an (n, d) query matrix
+        in a single FAISS call. Returns one result list per query, in order.
+        """
         if self.index is None:
             raise ValueError("Index not created. Call create_index first.")
         
-        # Reshape and normalize query
-        query = query_embedding.reshape(1, -1).astype('float32')
-        faiss.normalize_L2(query)
+        # Copy (normalize_L2 works in place) and normalize queries
+        queries = np.array(query_embeddings, dtype='float32', ndmin=2)
+        faiss.normalize_L2(queries)
         
         # Search
-        distances, indices = self.index.search(query, k)
-        
-        # Convert to results
-        results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx < len(self.job_metadata):
-                job = self.job_metadata[idx]
-                
-                # Apply filters if provided
-                if filters:
-                    if not self._matches_filters(job, filters):
-                        continue
-                
-                # Convert L2 distance to similarity score (0-1)
-                similarity = 1 / (1 + dist)
-                results.append((job, similarity))
-        
-        return results
+        if levels is not None:
+            params = self._level_search_params(levels)
+            if params is None:
+                return [[] for _ in range(len(queries))]
+            distances, indices = self.index.search(queries, k, params=params)
+        else:
+            distances, indices = self.index.search(queries, k)
+        
+        return [
+            self._collect_results(scores, ids, filters)
+            for scores, ids in zip(distances, indices)
+        ]
+    
+    def _collect_results(
+        self,
+        scores: np.ndarray,
+        ids: np.ndarray,
+        filters: Optional[Dict]
+    ) -> List[Tuple[Dict, float]]:
+        """Pair one query's hits with their job metadata, applying filters"""
+        # FAISS pads missing hits with id -1
+        keep = (ids >= 0) & (ids < len(self.job_metadata))
+        if filters:
+            keep[keep] = self._filter_mask(ids[keep], filters)
+        
+        # Inner product of normalized vectors is the cosine similarity
+        return [
+            (self.job_metadata[idx], score)
+            for score, idx in zip(scores[keep].tolist(), ids[keep].tolist())
+        ]
+    
+    def _filter_column(self, key: str) -> Tuple[Optional[Dict], Optional[np.ndarray]]:
+        """
+        job[key] for every indexed job as integer codes (-1 where the key
+        is missing), built on first use. (None, None) if a value is unhashable.
+        """
+        if key not in self._filter_columns:
+            codes = {}
+            column = np.empty(len(self.job_metadata), dtype=np.int32)
+            try:
+                for idx, job in enumerate(self.job_metadata):
+                    column[idx] = codes.setdefault(job[key], len(codes)) if key in job else -1
+            except TypeError:
+                codes, column = None, None
+            self._filter_columns[key] = (codes, column)
+        return self._filter_columns[key]
+    
+    def _filter_mask(self, ids: np.ndarray, filters: Dict) -> np.ndarray:
+        """
+        Which of the given positions match all filters, same rules as
+        _matches_filters, as one vectorized lookup per filter key.
+        """
+        mask = np.ones(len(ids), dtype=bool)
+        for key, value in filters.items():
+            codes, column = self._filter_column(key)
+            wanted = value if isinstance(value, list) else [value]
+            try:
+                wanted_codes = [codes[v] for v in wanted if v in codes] if codes is not None else None
+            except TypeError:
+                wanted_codes = None  # Unhashable filter value
+            
+            if wanted_codes is None:
+                mask &= np.fromiter(
+                    (self._matches_filters(self.job_metadata[idx], {key: value}) for idx in ids.tolist()),
+                    dtype=bool, count=len(ids)
+                )
+            else:
+                mask &= np.isin(column[ids], wanted_codes)
+        return mask
     
     def _matches_filters(self, job: Dict, filters: Dict) -> bool:
         """Check if job matches all filters"""
@@ -93,12 +318,14 @@ class VectorStore:
         index_path.parent.mkdir(parents=True, exist_ok=True)
         metadata_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Save FAISS index
-        faiss.write_index(self.index, str(index_path))
+        # Save FAISS index. Write-then-rename: a loaded index maps the old
+        # file, and truncating it in place would crash that process
+        tmp_index_path = index_path.with_name(index_path.name + ".tmp")
+        faiss.write_index(self.index, str(tmp_index_path))
+        os.replace(tmp_index_path, index_path)
         
         # Save metadata
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(self.job_metadata, f, indent=2, ensure_ascii=False)
+        metadata_path.write_bytes(orjson.dumps(self.job_metadata, option=orjson.OPT_INDENT_2))
         
         print(f" Saved index to {index_path}")
         print(f"Saved metadata to {metadata_path}")
@@ -115,17 +342,29 @@ class VectorStore:
         if not metadata_path.exists():
             raise FileNotFoundError(f"Metadata not found: {metadata_path}")
         
-        # Load FAISS index
-        self.index = faiss.read_index(str(index_path))
+        # Load FAISS index (memory-mapped, read-only)
+        index = faiss.read_index(str(index_path), _MMAP_FLAGS)
+        
+        # Older indexes were a bare IndexFlatL2: their ids aren't mapped and
+        # their scores are L2 distances (lower is better), which would rank
+        # the worst matches first
+        if not isinstance(index, faiss.IndexIDMap) or index.metric_type != faiss.METRIC_INNER_PRODUCT:
+            raise IndexFormatError(
+                f"Index at {index_path} uses an outdated format "
+                f"({type(index).__name__}); re-ingest the job index"
+            )
+        self.index = index
+        self._set_search_params()
         
         # Load metadata
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            self.job_metadata = json.load(f)
+        self.job_metadata = orjson.loads(metadata_path.read_bytes())
         
         # Rebuild ID mapping
         self.job_id_to_idx = {
             job['id']: idx for idx, job in enumerate(self.job_metadata)
         }
+        self._build_level_bitmaps()
+        self._filter_columns = {}
         
         print(f"Loaded index with {self.index.ntotal} jobs")
         print(f" Loaded {len(self.job_metadata)} job metadata")
@@ -135,8 +374,18 @@ class VectorStore:
         if self.index is None:
             return {"status": "No index loaded"}
         
+        # HNSW keeps its vector codes in a storage index (graph links not counted)
+        hnsw_index = self._hnsw_index()
+        if hnsw_index is not None:
+            codes = faiss.downcast_index(hnsw_index.storage)
+        elif isinstance(self.index, faiss.IndexIDMap):
+            codes = self.index.index
+        else:
+            codes = self.index
+        
         return {
             "total_jobs": self.index.ntotal,
             "dimension": self.dimension,
+            "bytes_per_vector": codes.sa_code_size(),
             "metadata_count": len(self.job_metadata)
         }
\ No newline at end of file
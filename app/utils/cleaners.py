@@ -1,24 +1,28 @@
 import re
 
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+_SPACES_RE = re.compile(r'[ \t]+')
+# A newline not preceded by '.'/':' and followed by a lowercase letter.
+# ASCII is joined by a plain substitution; lines starting with any other
+# character go through str.islower(). The lookbehind comes after the
+# literal \n so the regex engine can scan ahead for newlines
+_BROKEN_LINE_RE = re.compile(r'\n(?<![.:]\n)(?=[a-z])')
+_BROKEN_LINE_NON_ASCII_RE = re.compile(r'\n(?<![.:]\n)(?=[^\x00-\x7f])')
+
 def normalize_whitespace(text: str) -> str:
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r'[ \t]+', ' ', text)
+    text = _BLANK_LINES_RE.sub('\n\n', text)
+    text = _SPACES_RE.sub(' ', text)
     return text.strip()
 
+def _join_broken_line(match: re.Match) -> str:
+    return ' ' if match.string[match.end()].islower() else '\n'
+
 def fix_broken_lines(text: str) -> str:
     """
     Fix lines broken mid-sentence.
     """
-    lines = text.split('\n')
-    fixed = []
-
-    for line in lines:
-        if fixed and not fixed[-1].endswith(('.', ':')) and line and line[0].islower():
-            fixed[-1] += ' ' + line
-        else:
-            fixed.append(line)
-
-    return '\n'.join(fixed)
+    text = _BROKEN_LINE_RE.sub(' ', text)
+    return _BROKEN_LINE_NON_ASCII_RE.sub(_join_broken_line, text)
 
 def clean_text(text: str) -> str:
     text = normalize_whitespace(text)
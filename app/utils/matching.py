@@ -0,0 +1,54 @@
+"""
+Multi-keyword matching with an Aho-Corasick automaton.
+"""
+from typing import Iterable, Iterator, Tuple
+import ahocorasick
+
+
+def build_automaton(words: Iterable[str]) -> ahocorasick.Automaton:
+    """Build an automaton whose matches yield the matched word itself"""
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        if word:
+            automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def _is_regex_boundary(text: str, index: int) -> bool:
+    """Same test as regex \\b between text[index - 1] and text[index]"""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+def iter_matches(
+    automaton: ahocorasick.Automaton,
+    text: str,
+    whole_words: bool = False,
+    regex_boundaries: bool = False
+) -> Iterator[Tuple[int, str]]:
+    """
+    Scan text once, yielding (start_index, word) for every match.
+    With whole_words, matches touching a letter/digit on either side are skipped.
+    With regex_boundaries, only matches that r'\\b' + re.escape(word) + r'\\b'
+    would accept are kept (words may start or end with punctuation, e.g. c++).
+    """
+    if len(automaton) == 0:
+        return
+    
+    for end, word in automaton.iter(text):
+        start = end - len(word) + 1
+        if whole_words:
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end + 1 < len(text) and _is_word_char(text[end + 1]):
+                continue
+        if regex_boundaries:
+            if not (_is_regex_boundary(text, start) and _is_regex_boundary(text, end + 1)):
+                continue
+        yield start, word